@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Browse latency benchmark against a local fake Spotify Web API.
+
+Compares the artist page built with serial requests (the previous implementation)
+against the current concurrent one. Each fake endpoint answers after --latency ms.
+
+    python scripts/bench_browse.py --latency 80 --runs 20
+
+:copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ucapi.api_definitions import Paging  # noqa: E402
+from ucapi.media_player import BrowseOptions  # noqa: E402
+
+from uc_intg_spotify import browser, client as client_module  # noqa: E402
+from uc_intg_spotify.client import ARTIST_ALBUMS_MAX_LIMIT, SpotifyClient  # noqa: E402
+
+ALBUM_TOTAL = 120
+TOP_TRACKS = 10
+PAGE_LIMIT = TOP_TRACKS + 20  # the top tracks and the 20 albums the serial version showed
+
+
+def _image(name: str) -> list[dict]:
+    return [{"url": f"https://i.scdn.co/image/{name}", "width": 640, "height": 640}]
+
+
+def _album(index: int) -> dict:
+    return {
+        "id": f"al{index}",
+        "name": f"Album {index}",
+        "artists": [{"name": "Artist"}],
+        "images": _image(f"al{index}"),
+    }
+
+
+def _track(index: int) -> dict:
+    return {
+        "id": f"tr{index}",
+        "name": f"Track {index}",
+        "artists": [{"name": "Artist"}],
+        "album": _album(index),
+        "duration_ms": 200000,
+    }
+
+
+def make_app(latency: float) -> web.Application:
+    counts: dict[str, int] = {}
+
+    async def delayed(request: web.Request, payload: dict) -> web.Response:
+        counts[request.path] = counts.get(request.path, 0) + 1
+        await asyncio.sleep(latency)
+        return web.json_response(payload)
+
+    async def artist(request: web.Request) -> web.Response:
+        return await delayed(request, {"id": request.match_info["id"], "name": "Artist", "images": _image("ar")})
+
+    async def top_tracks(request: web.Request) -> web.Response:
+        return await delayed(request, {"tracks": [_track(i) for i in range(TOP_TRACKS)]})
+
+    async def albums(request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 20))
+        offset = int(request.query.get("offset", 0))
+        items = [_album(i) for i in range(offset, min(offset + limit, ALBUM_TOTAL))]
+        return await delayed(request, {"items": items, "total": ALBUM_TOTAL, "limit": limit, "offset": offset})
+
+    app = web.Application()
+    app["counts"] = counts
+    app.router.add_get("/v1/artists/{id}", artist)
+    app.router.add_get("/v1/artists/{id}/top-tracks", top_tracks)
+    app.router.add_get("/v1/artists/{id}/albums", albums)
+    return app
+
+
+async def serial_artist(client: SpotifyClient, artist_id: str) -> int:
+    """The previous implementation: every round trip after the other."""
+    items = 0
+    if await client.get_artist(artist_id):
+        top = await client.get_artist_top_tracks(artist_id)
+        items += len((top or {}).get("tracks", []))
+        for offset in range(0, PAGE_LIMIT - TOP_TRACKS, ARTIST_ALBUMS_MAX_LIMIT):
+            albums = await client.get_artist_albums(artist_id, limit=ARTIST_ALBUMS_MAX_LIMIT, offset=offset)
+            items += len((albums or {}).get("items", []))
+    return items
+
+
+async def concurrent_artist(client: SpotifyClient, artist_id: str) -> int:
+    options = BrowseOptions(media_id=f"artist_{artist_id}", paging=Paging(page=1, limit=PAGE_LIMIT))
+    result = await browser._browse_artist(client, artist_id, options)
+    return len(result.media.items)
+
+
+async def measure(label: str, func, client: SpotifyClient, runs: int) -> None:
+    timings = []
+    items = 0
+    for run in range(runs):
+        started = time.perf_counter()
+        items = await func(client, f"bench{run}")
+        timings.append((time.perf_counter() - started) * 1000)
+    print(
+        f"{label:<12} items={items:<3} median={statistics.median(timings):7.1f} ms "
+        f"p95={sorted(timings)[int(0.95 * (len(timings) - 1))]:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--latency", type=float, default=80, help="fake API latency in ms")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app(args.latency / 1000)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client_module.SPOTIFY_API_BASE_URL = f"http://127.0.0.1:{port}/v1"
+
+    client = SpotifyClient("bench-token", "bench-refresh")
+    try:
+        print(f"Fake API latency {args.latency:.0f} ms, {args.runs} runs")
+        await measure("serial", serial_artist, client, args.runs)
+        await measure("concurrent", concurrent_artist, client, args.runs)
+        print(f"Requests served: {sum(app['counts'].values())}")
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
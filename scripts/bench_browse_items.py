@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""BrowseMediaItem conversion benchmark on large pages.
+
+Builds browse items for a page of N tracks, first with an empty intern cache (every
+item constructed) and then warm (every item reused), the way the same tracks come
+back in Liked Songs, Recently Played, Top Tracks and playlists.
+
+    python scripts/bench_browse_items.py --tracks 1000 --rounds 50
+
+:copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uc_intg_spotify import browser  # noqa: E402
+
+
+def make_tracks(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"track{i:06d}",
+            "name": f"Track {i}",
+            "artists": [{"name": "First Artist"}, {"name": f"Featured {i % 17}"}],
+            "album": {
+                "name": f"Album {i // 12}",
+                "images": [
+                    {"url": f"https://i.scdn.co/image/{i:040x}", "width": 640, "height": 640},
+                    {"url": f"https://i.scdn.co/image/{i:040x}s", "width": 300, "height": 300},
+                ],
+            },
+            "duration_ms": 180000 + i,
+            "is_playable": True,
+        }
+        for i in range(count)
+    ]
+
+
+def build_page(tracks: list[dict]) -> int:
+    return sum(1 for track in tracks if browser._track_to_browse_item(track))
+
+
+def measure(tracks: list[dict], rounds: int, warm: bool) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        if not warm:
+            browser._items.clear()
+        started = time.perf_counter()
+        build_page(tracks)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--tracks", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    tracks = make_tracks(args.tracks)
+    cold = measure(tracks, args.rounds, warm=False)
+    build_page(tracks)
+    warm = measure(tracks, args.rounds, warm=True)
+
+    print(f"{args.tracks} tracks per page, {args.rounds} rounds")
+    print(f"cold  median={statistics.median(cold):7.2f} ms")
+    print(f"warm  median={statistics.median(warm):7.2f} ms")
+    print(f"speedup x{statistics.median(cold) / statistics.median(warm):.1f}")
+
+
+if __name__ == "__main__":
+    main()
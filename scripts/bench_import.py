@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for integration cold start.
+
+Imports each module in a fresh interpreter with ``-X importtime`` and reports the
+median cumulative import time, and checks that modules meant to load lazily (browse
+machinery, SQLite library mirror, artwork proxy server) are not pulled in by the
+driver import that sits on the startup path.
+
+    python scripts/bench_import.py --rounds 10
+    python scripts/bench_import.py --check --max-ms 1500   # as run in CI
+
+:copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = ("uc_intg_spotify", "uc_intg_spotify.driver")
+STARTUP_MODULE = "uc_intg_spotify.driver"
+DEFERRED = (
+    "uc_intg_spotify.browser",
+    "uc_intg_spotify.browsecache",
+    "uc_intg_spotify.library",
+    "uc_intg_spotify.librarystore",
+    "uc_intg_spotify.searchsession",
+    "uc_intg_spotify.thumbnails",
+    "uc_intg_spotify.artcache",
+    "aiohttp.web",
+    "sqlite3",
+)
+
+
+def import_ms(module: str) -> float:
+    """Cumulative import time of ``module`` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def loaded_deferred(module: str) -> list[str]:
+    code = f"import sys, {module}; print('\\n'.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--check", action="store_true", help="fail if a deferred module is imported")
+    parser.add_argument("--max-ms", type=float, default=0, help=f"fail if {STARTUP_MODULE} takes longer")
+    args = parser.parse_args()
+
+    medians = {}
+    for module in TARGETS:
+        timings = [import_ms(module) for _ in range(args.rounds)]
+        medians[module] = statistics.median(timings)
+        print(f"{module:28} median={medians[module]:7.1f} ms  min={min(timings):7.1f} ms")
+
+    eager = loaded_deferred(STARTUP_MODULE)
+    print(f"deferred modules loaded by {STARTUP_MODULE}: {', '.join(eager) or 'none'}")
+
+    failed = False
+    if args.check and eager:
+        print("FAIL: modules meant to load lazily are imported at startup")
+        failed = True
+    if args.max_ms and medians[STARTUP_MODULE] > args.max_ms:
+        print(f"FAIL: {STARTUP_MODULE} import exceeds {args.max_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,10 @@ import asyncio
 import json
 import logging
 import os
+import signal
+import time
 from pathlib import Path
 
-from ucapi import DeviceStates
-from ucapi_framework import BaseConfigManager, get_config_path
-
-from uc_intg_spotify.config import SpotifyDeviceConfig
-from uc_intg_spotify.driver import SpotifyDriver
-from uc_intg_spotify.setup import SpotifySetupFlow
 
 try:
     driver_path = Path(__file__).parent.parent / "driver.json"
@@ -32,6 +28,16 @@ async def main() -> None:
     logging.getLogger("websockets.server").setLevel(logging.CRITICAL)
     _LOG.info("Starting Spotify integration v%s", __version__)
 
+    # Imported here rather than at module level so that importing the package (tools,
+    # benchmarks, ``python -m``) stays cheap; see scripts/bench_import.py.
+    started = time.monotonic()
+    from ucapi import DeviceStates
+    from ucapi_framework import BaseConfigManager, get_config_path
+
+    from uc_intg_spotify.config import SpotifyDeviceConfig
+    from uc_intg_spotify.driver import SpotifyDriver
+    from uc_intg_spotify.setup import SpotifySetupFlow
+
     driver = SpotifyDriver()
     config_path = get_config_path(driver.api.config_dir_path or "")
     config_manager = BaseConfigManager(
@@ -45,14 +51,45 @@ async def main() -> None:
     setup_handler = SpotifySetupFlow.create_handler(driver)
     driver_json_path = os.path.join(os.path.dirname(__file__), "..", "driver.json")
     await driver.api.init(os.path.abspath(driver_json_path), setup_handler)
+    ready = time.monotonic()
+
+    # After api.init so the remote gets an answer first; before devices connect so
+    # the artwork URLs they hand out already point at the proxy.
+    from uc_intg_spotify.artcache import ArtworkCache, proxy_enabled
+
+    if proxy_enabled():
+        artwork = ArtworkCache(os.path.join(config_path, "artwork"))
+        if await artwork.start():
+            driver.artwork = artwork
+    artwork_ready = time.monotonic()
+    # Connects each account, warms it up, then registers its entities.
     await driver.register_all_device_instances(connect=False)
+    driver.startup_timings["integration"] = {
+        "init": round((ready - started) * 1000, 1),
+        "artwork": round((artwork_ready - ready) * 1000, 1),
+        "accounts": round((time.monotonic() - artwork_ready) * 1000, 1),
+    }
 
     device_count = len(list(config_manager.all()))
     await driver.api.set_device_state(
         DeviceStates.CONNECTED if device_count > 0 else DeviceStates.DISCONNECTED
     )
-    _LOG.info("Spotify integration started - %d device(s) configured", device_count)
-    await asyncio.Future()
+    _LOG.info(
+        "Spotify integration started - %d device(s) configured, startup timings (ms): %s",
+        device_count, driver.startup_timings["integration"],
+    )
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # no signal handlers on Windows event loops
+            pass
+    try:
+        await stopping.wait()
+    finally:
+        _LOG.info("Stopping Spotify integration")
+        await driver.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+"""Spotify artwork proxy and disk cache. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import socket
+import ssl
+import urllib.parse
+from collections import OrderedDict
+
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from uc_intg_spotify.artwork import ARTWORK_SIZES, env_int, set_url_rewriter
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+_LOG = logging.getLogger(__name__)
+
+ARTWORK_PORT = env_int("UC_SPOTIFY_ARTWORK_PORT", 9091)
+ARTWORK_CACHE_MAX_BYTES = env_int("UC_SPOTIFY_ARTWORK_CACHE_MB", 64) * 1024 * 1024
+ARTWORK_ALLOWED_HOSTS = ("scdn.co", "spotifycdn.com")
+ARTWORK_FETCH_TIMEOUT = 10
+_EVICT_TO = 0.9  # fraction of the cap left after an eviction pass
+_EXTENSIONS = {b"\x89PNG": ".png", b"RIFF": ".webp"}
+_CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+
+def proxy_enabled() -> bool:
+    return os.getenv("UC_SPOTIFY_ARTWORK_PROXY", "1").lower() not in ("0", "false", "no", "off")
+
+
+def is_allowed(url: str) -> bool:
+    parsed = urllib.parse.urlsplit(url)
+    host = (parsed.hostname or "").lower()
+    return parsed.scheme == "https" and any(host == h or host.endswith(f".{h}") for h in ARTWORK_ALLOWED_HOSTS)
+
+
+def _lan_address() -> str:
+    """Address the remote can reach us on: explicit override, else the LAN interface."""
+    configured = os.getenv("UC_SPOTIFY_ARTWORK_HOST")
+    if configured:
+        return configured
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.connect(("10.255.255.255", 1))  # no packet is sent for UDP connect
+            return sock.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+class ArtworkCache:
+    """Serves Spotify artwork from a local disk cache over HTTP.
+
+    Image URLs handed to the remote are rewritten to ``/artwork?u=<cdn url>&s=<px>``
+    on this server. The first request downloads the image (Spotify CDN hosts only),
+    shrinks it to the requested edge length with Pillow, and stores it; later
+    requests are served from disk. Spotify image URLs already name their content by
+    hash, so files are addressed by a digest of URL and size. The cache is capped in
+    bytes and evicts the least recently served files first.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = ARTWORK_CACHE_MAX_BYTES) -> None:
+        self._dir = cache_dir
+        self._max_bytes = max_bytes
+        self._files: OrderedDict[str, tuple[str, int]] = OrderedDict()  # key -> (filename, size), LRU first
+        self._total = 0
+        self._pending: dict[str, asyncio.Task[str | None]] = {}
+        self._session: aiohttp.ClientSession | None = None
+        self._runner: web.AppRunner | None = None
+        self._base_url = ""
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0, "errors": 0, "evictions": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._base_url)
+
+    async def start(self, port: int = ARTWORK_PORT) -> bool:
+        from aiohttp import web  # the server side of aiohttp is only needed with the proxy on
+
+        try:
+            for key, entry in await asyncio.to_thread(_scan, self._dir):
+                self._files[key] = entry
+                self._total += entry[1]
+            app = web.Application()
+            app.router.add_get("/artwork", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            interface = os.getenv("UC_INTEGRATION_INTERFACE") or "0.0.0.0"
+            await web.TCPSite(self._runner, interface, port).start()
+        except OSError as err:
+            _LOG.warning("Artwork proxy unavailable, using Spotify image URLs directly: %s", err)
+            await self.stop()
+            return False
+        self._base_url = f"http://{_lan_address()}:{port}/artwork"
+        set_url_rewriter(self.url)
+        _LOG.info("Artwork proxy on %s (%d cached files)", self._base_url, len(self._files))
+        return True
+
+    async def stop(self) -> None:
+        set_url_rewriter(None)
+        self._base_url = ""
+        for task in self._pending.values():
+            task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def url(self, source: str, size: int | None = None) -> str:
+        """LAN URL serving ``source`` scaled to ``size`` px; unchanged if not proxied."""
+        if not self._base_url or not is_allowed(source):
+            return source
+        query = {"u": source}
+        if size:
+            query["s"] = str(size)
+        return f"{self._base_url}?{urllib.parse.urlencode(query)}"
+
+    async def prefetch(self, urls: list[str]) -> int:
+        """Warm the cache for URLs handed out by :meth:`url`; returns how many are cached."""
+        cached = 0
+        for url in urls:
+            if not self._base_url or not url.startswith(f"{self._base_url}?"):
+                continue
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+            size = (query.get("s") or [""])[0]
+            if await self.fetch((query.get("u") or [""])[0], int(size) if size.isdigit() else None):
+                cached += 1
+        return cached
+
+    async def fetch(self, source: str, size: int | None = None) -> str | None:
+        """Path of the cached file for ``source`` at ``size``, downloading it if needed."""
+        if not is_allowed(source):
+            return None
+        key = hashlib.sha256(f"{source}|{size or 0}".encode()).hexdigest()[:40]
+        cached = self._files.get(key)
+        if cached:
+            self.stats["hits"] += 1
+            self._files.move_to_end(key)
+            path = os.path.join(self._dir, cached[0])
+            try:
+                os.utime(path)  # keeps the LRU order across restarts
+                return path
+            except OSError:
+                self._forget(key)
+        task = self._pending.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._download(key, source, size))
+            self._pending[key] = task
+            task.add_done_callback(lambda _t, k=key: self._pending.pop(k, None))
+        return await asyncio.shield(task)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        from aiohttp import web
+
+        source = request.query.get("u", "")
+        size = request.query.get("s", "")
+        if not is_allowed(source):
+            raise web.HTTPForbidden()
+        # Only the sizes we hand out, so callers cannot fill the cache with variants.
+        px = int(size) if size.isdigit() and int(size) in ARTWORK_SIZES.values() else None
+        path = await self.fetch(source, px)
+        if path is None:
+            raise web.HTTPFound(source)  # let the remote try the CDN itself
+        return web.FileResponse(
+            path,
+            headers={
+                "Content-Type": _CONTENT_TYPES.get(os.path.splitext(path)[1], "image/jpeg"),
+                "Cache-Control": "public, max-age=604800, immutable",
+            },
+        )
+
+    async def _download(self, key: str, source: str, size: int | None) -> str | None:
+        try:
+            session = await self._get_session()
+            async with session.get(source) as response:
+                if response.status != 200:
+                    self.stats["errors"] += 1
+                    return None
+                data = await response.read()
+            filename, nbytes = await asyncio.to_thread(_write, self._dir, key, data, size)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as err:
+            self.stats["errors"] += 1
+            _LOG.debug("Artwork download failed for %s: %s", source, err)
+            return None
+        self._files[key] = (filename, nbytes)
+        self._total += nbytes
+        if self._total > self._max_bytes:
+            victims = []
+            while self._total > self._max_bytes * _EVICT_TO and len(self._files) > 1:
+                old_key = next(iter(self._files))
+                victims.append(self._files[old_key][0])
+                self._forget(old_key)
+            self.stats["evictions"] += len(victims)
+            await asyncio.to_thread(_remove, self._dir, victims)
+        return os.path.join(self._dir, filename)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            import certifi
+
+            ssl_context = ssl.create_default_context(cafile=certifi.where())
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=ssl_context, limit_per_host=4),
+                timeout=aiohttp.ClientTimeout(total=ARTWORK_FETCH_TIMEOUT),
+            )
+        return self._session
+
+    def _forget(self, key: str) -> None:
+        entry = self._files.pop(key, None)
+        if entry:
+            self._total -= entry[1]
+
+
+def _scan(cache_dir: str) -> list[tuple[str, tuple[str, int]]]:
+    """Cached files as ``(key, (filename, size))``, least recently served first."""
+    os.makedirs(cache_dir, exist_ok=True)
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, os.path.splitext(entry.name)[0], entry.name, stat.st_size))
+    entries.sort()
+    return [(key, (name, size)) for _, key, name, size in entries]
+
+
+def _write(cache_dir: str, key: str, data: bytes, size: int | None) -> tuple[str, int]:
+    ext = _EXTENSIONS.get(data[:4], ".jpg")
+    if size:
+        data, ext = _resize(data, size, ext)
+    filename = key + ext
+    path = os.path.join(cache_dir, filename)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return filename, len(data)
+
+
+def _remove(cache_dir: str, filenames: list[str]) -> None:
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(cache_dir, filename))
+        except OSError:
+            pass
+
+
+def _resize(data: bytes, size: int, ext: str) -> tuple[bytes, str]:
+    from PIL import Image  # imported on the first download, not at startup
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if max(image.size) <= size:
+                return data, ext
+            image.thumbnail((size, size), Image.LANCZOS)
+            out = io.BytesIO()
+            image.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+            return out.getvalue(), ".jpg"
+    except Exception as err:  # a corrupt or unsupported image is served as is
+        _LOG.debug("Artwork resize failed: %s", err)
+        return data, ext
@@ -0,0 +1,75 @@
+"""Spotify artwork selection. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Callable
+
+_LOG = logging.getLogger(__name__)
+
+ARTWORK_LIST = "list"
+ARTWORK_NOW_PLAYING = "now_playing"
+ARTWORK_TILE = "tile"
+
+
+def env_int(name: str, default: int) -> int:
+    """Integer environment setting; an invalid value logs a warning and uses ``default``."""
+    value = os.getenv(name, "")
+    try:
+        return int(value) if value else default
+    except ValueError:
+        _LOG.warning("Ignoring invalid %s=%r, using %d", name, value, default)
+        return default
+
+
+# Target edge length in pixels; the smallest Spotify image at least this large wins.
+ARTWORK_SIZES: dict[str, int] = {
+    ARTWORK_LIST: env_int("UC_SPOTIFY_ARTWORK_LIST_PX", 100),
+    ARTWORK_NOW_PLAYING: env_int("UC_SPOTIFY_ARTWORK_NOW_PLAYING_PX", 480),
+    ARTWORK_TILE: env_int("UC_SPOTIFY_ARTWORK_TILE_PX", 200),
+}
+
+# Set by the artwork proxy to hand out LAN URLs instead of Spotify CDN URLs.
+_rewriter: Callable[[str, int | None], str] | None = None
+
+
+def set_url_rewriter(rewriter: Callable[[str, int | None], str] | None) -> None:
+    global _rewriter
+    _rewriter = rewriter
+
+
+def proxied(url: str | None, purpose: str = ARTWORK_LIST) -> str | None:
+    """``url`` as handed to the remote: through the artwork proxy when it runs."""
+    if url and _rewriter is not None:
+        return _rewriter(url, ARTWORK_SIZES.get(purpose, ARTWORK_SIZES[ARTWORK_LIST]))
+    return url
+
+
+def pick_image(
+    images: list[dict[str, Any]] | None, purpose: str = ARTWORK_LIST, rewrite: bool = True
+) -> str | None:
+    """URL of the smallest image covering the target size for ``purpose``.
+
+    Falls back to the largest image when none is big enough, and to the first one
+    when Spotify reports no sizes (as for some playlist covers). With ``rewrite``
+    off the Spotify CDN URL is returned, for storing; pass it through
+    :func:`proxied` when handing it out.
+    """
+    if not images:
+        return None
+    target = ARTWORK_SIZES.get(purpose, ARTWORK_SIZES[ARTWORK_LIST])
+    best = None
+    best_size = 0
+    largest = None
+    largest_size = 0
+    for image in images:
+        size = max(image.get("width") or 0, image.get("height") or 0)
+        if not size:
+            continue
+        if size >= target and (best is None or size < best_size):
+            best, best_size = image, size
+        if size > largest_size:
+            largest, largest_size = image, size
+    chosen = best or largest or images[0]
+    url = chosen.get("url") or None
+    return proxied(url, purpose) if rewrite else url
@@ -0,0 +1,226 @@
+"""Spotify browse result cache. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from ucapi import StatusCodes
+from ucapi.media_player import BrowseMediaItem, BrowseResults
+
+_LOG = logging.getLogger(__name__)
+
+BROWSE_CACHE_MAX_ITEMS = 5000  # browse items held across all cached pages
+INTERN_CACHE_SIZE = 4096
+CURSOR_CHAINS_MAX = 64  # (account, node, page size) combinations remembered
+
+# (ttl, stale) in seconds: results are fresh for ttl and served while revalidating
+# for another stale seconds. Prefixes cover the playlist_/album_/artist_ nodes.
+NODE_TTLS: dict[str, tuple[float, float]] = {
+    "playlists": (300, 3600),
+    "saved_tracks": (300, 3600),
+    "saved_albums": (300, 3600),
+    "followed_artists": (600, 3600),
+    "top_tracks": (3600, 86400),
+    "top_artists": (3600, 86400),
+    "new_releases": (3600, 86400),
+    "recently_played": (15, 60),
+    "queue": (2, 0),
+    "playlist_": (300, 3600),
+    "album_": (3600, 86400),
+    "artist_": (1800, 86400),
+}
+DEFAULT_TTL = (60, 300)
+
+CacheKey = tuple[str, str, int, int]
+Result = BrowseResults | StatusCodes
+Loader = Callable[[], Awaitable[Result]]
+
+
+def node_ttl(media_id: str) -> tuple[float, float]:
+    ttl = NODE_TTLS.get(media_id)
+    if ttl is None:
+        prefix = media_id.split("_", 1)[0] + "_"
+        ttl = NODE_TTLS.get(prefix, DEFAULT_TTL)
+    return ttl
+
+
+class _Entry:
+    __slots__ = ("results", "stored", "ttl", "stale", "size")
+
+    def __init__(self, results: BrowseResults, ttl: tuple[float, float]) -> None:
+        self.results = results
+        self.stored = time.monotonic()
+        self.ttl, self.stale = ttl
+        self.size = 1 + len(results.media.items or []) if results.media else 1
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored
+
+
+class BrowseCache:
+    """LRU cache of built ``BrowseResults`` keyed by ``(account, media_id, page, limit)``.
+
+    Fresh entries are returned as-is. Entries past their TTL but inside the stale
+    window are returned immediately while one background load refreshes them;
+    older entries are loaded in the foreground. Concurrent loads of the same key
+    share one request. Eviction is by total item count, least recently used first.
+    """
+
+    def __init__(self, max_items: int = BROWSE_CACHE_MAX_ITEMS) -> None:
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._inflight: dict[CacheKey, asyncio.Task[Result | None]] = {}
+        self._max_items = max_items
+        self._size = 0
+        self.stats: dict[str, int] = {"hits": 0, "stale": 0, "misses": 0, "evictions": 0}
+
+    async def get(self, key: CacheKey, loader: Loader) -> Result | None:
+        """Return the cached page for ``key``; None only if a foreground load raised."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = entry.age()
+            if age < entry.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.results
+            if age < entry.ttl + entry.stale:
+                self._entries.move_to_end(key)
+                self.stats["stale"] += 1
+                self._load(key, loader)
+                return entry.results
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._load(key, loader))
+
+    def is_fresh(self, key: CacheKey) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.age() < entry.ttl
+
+    def peek(self, key: CacheKey) -> BrowseResults | None:
+        entry = self._entries.get(key)
+        return entry.results if entry else None
+
+    def invalidate(self, account: str, media_id: str | None = None) -> None:
+        """Drop cached pages of one node, or of the whole account."""
+        for key in [k for k in self._entries if k[0] == account and (media_id is None or k[1] == media_id)]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+        self._entries.clear()
+        self._size = 0
+
+    def _load(self, key: CacheKey, loader: Loader) -> asyncio.Task[Result | None]:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, loader))
+            self._inflight[key] = task
+        return task
+
+    async def _run(self, key: CacheKey, loader: Loader) -> Result | None:
+        try:
+            results = await loader()
+        except Exception as err:
+            _LOG.debug("Browse load for %s failed: %s", key[1], err)
+            results = None
+        finally:
+            self._inflight.pop(key, None)
+        # Empty pages are what failed requests build too, so only keep real content.
+        if isinstance(results, BrowseResults) and results.media and results.media.items:
+            self._store(key, results)
+        return results
+
+    def _store(self, key: CacheKey, results: BrowseResults) -> None:
+        self._drop(key)
+        entry = _Entry(results, node_ttl(key[1]))
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self._max_items and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+
+class InternCache:
+    """Bounded LRU of built ``BrowseMediaItem`` objects.
+
+    The same tracks, albums and artists turn up in many browse lists; interning them
+    by Spotify id plus a version marker returns the already validated object instead
+    of building it again. Items are treated as immutable once interned.
+    """
+
+    def __init__(self, max_size: int = INTERN_CACHE_SIZE) -> None:
+        self._items: OrderedDict[tuple, BrowseMediaItem] = OrderedDict()
+        self._max_size = max_size
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0}
+
+    def get(self, key: tuple) -> BrowseMediaItem | None:
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+        return item
+
+    def put(self, key: tuple, item: BrowseMediaItem) -> BrowseMediaItem:
+        self.stats["misses"] += 1
+        self._items[key] = item
+        if len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+        return item
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class CursorChains:
+    """Page number to cursor maps for endpoints paged by ``before``/``after`` cursors.
+
+    Spotify returns the cursor of the following page with each page, so page N can
+    only be reached by walking from a page whose cursor is known. Recording every
+    cursor seen lets a deep page start from the nearest known one instead of page 1.
+    Chains expire with the node's cache lifetime (ttl plus stale window).
+    """
+
+    def __init__(self, max_chains: int = CURSOR_CHAINS_MAX) -> None:
+        self._chains: OrderedDict[tuple[str, str, int], tuple[float, dict[int, str]]] = OrderedDict()
+        self._max_chains = max_chains
+
+    def nearest(self, key: tuple[str, str, int], page: int) -> tuple[int, str | None]:
+        """Highest known page at or before ``page`` and the cursor that fetches it."""
+        chain = self._chain(key)
+        known = max((p for p in chain if p <= page), default=1)
+        return known, chain.get(known)
+
+    def record(self, key: tuple[str, str, int], page: int, cursor: str) -> None:
+        chain = self._chain(key)
+        if not chain:
+            self._chains[key] = (time.monotonic(), chain)
+        chain[page] = cursor
+        self._chains.move_to_end(key)
+        while len(self._chains) > self._max_chains:
+            self._chains.popitem(last=False)
+
+    def invalidate(self, account: str, media_id: str | None = None) -> None:
+        for key in [k for k in self._chains if k[0] == account and (media_id is None or k[1] == media_id)]:
+            del self._chains[key]
+
+    def clear(self) -> None:
+        self._chains.clear()
+
+    def _chain(self, key: tuple[str, str, int]) -> dict[int, str]:
+        entry = self._chains.get(key)
+        if entry is None:
+            return {}
+        ttl, stale = node_ttl(key[1])
+        if time.monotonic() - entry[0] > ttl + stale:
+            del self._chains[key]
+            return {}
+        return entry[1]
@@ -3,10 +3,12 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import TYPE_CHECKING
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 from ucapi import StatusCodes
-from ucapi.api_definitions import Pagination
+from ucapi.api_definitions import Pagination, Paging
 from ucapi.media_player import (
     BrowseMediaItem,
     BrowseOptions,
@@ -17,8 +19,23 @@ from ucapi.media_player import (
     SearchResults,
 )
 
+from uc_intg_spotify.artwork import ARTWORK_TILE, pick_image, proxied
+from uc_intg_spotify.browsecache import BrowseCache, CursorChains, InternCache, node_ttl
+from uc_intg_spotify.client import (
+    ALBUM_TRACKS_MAX_LIMIT,
+    ARTIST_ALBUMS_MAX_LIMIT,
+    ARTIST_TOP_TRACKS,
+    SEARCH_MAX_LIMIT,
+    SEARCH_MAX_OFFSET,
+    SEARCH_TYPES,
+)
+from uc_intg_spotify.library import KIND_ALBUM, KIND_ARTIST, KIND_PLAYLIST, KIND_TRACK, LibraryIndex
+from uc_intg_spotify.searchsession import SearchSession
+from uc_intg_spotify.thumbnails import RootThumbnails, fetch_root_thumbnails
+
 if TYPE_CHECKING:
     from uc_intg_spotify.client import SpotifyClient
+    from uc_intg_spotify.playqueue import PlaybackQueue
 
 _LOG = logging.getLogger(__name__)
 
@@ -35,26 +52,170 @@ ROOT_ITEMS = [
 ]
 
 
-async def browse(client: SpotifyClient, options: BrowseOptions) -> BrowseResults | StatusCodes:
+PREFETCH_CHILDREN = 3  # first browsable children warmed after a page is shown
+PREFETCH_MIN_TTL = 60  # nodes that expire faster than this are not worth warming
+PREFETCH_MIN_HEADROOM = 10  # budget tokens left for polls on top of the command reserve
+ALBUM_HEADERS_MAX = 256  # albums whose name, artwork and first tracks are kept
+CURSOR_MAX_WALK = 5  # pages fetched on the way to a page with no known cursor
+
+_cache = BrowseCache()
+_items = InternCache()
+_cursors = CursorChains()
+# (account, album id) -> (stored, header); track lists depend on the account's market
+_album_headers: OrderedDict[tuple[str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+_prefetch_tasks: dict[str, asyncio.Task[None]] = {}
+# (account, node kind) -> page limit the remote last browsed that kind of node with
+_requested_limits: dict[tuple[str, str], int] = {}
+
+
+async def browse(
+    client: SpotifyClient,
+    options: BrowseOptions,
+    queue: PlaybackQueue | None = None,
+    account: str = "",
+    root_thumbnails: RootThumbnails | None = None,
+    prefetch_budget: int = 0,
+    library: LibraryIndex | None = None,
+) -> BrowseResults | StatusCodes:
+    """Browse a node. With a ``prefetch_budget`` (API requests), the next page and the
+    first children of the result are warmed in the cache after it is returned."""
     if not client or not client.is_authenticated():
         return StatusCodes.SERVICE_UNAVAILABLE
 
-    media_id = options.media_id if hasattr(options, "media_id") else None
+    media_id = (options.media_id if hasattr(options, "media_id") else None) or "root"
+    key = (account, media_id, _get_page(options), _get_limit(options))
+    _requested_limits[(account, _node_kind(media_id))] = key[3]
+    _cancel_prefetch(account)
+
+    if not _is_cacheable(media_id):
+        result = await _browse_node(client, media_id, options, queue, root_thumbnails, library, account)
+    else:
+        result = await _cache.get(
+            key, lambda: _browse_node(client, media_id, options, queue, root_thumbnails, library, account)
+        )
+        if result is None:
+            return StatusCodes.SERVER_ERROR
+
+    if prefetch_budget > 0 and isinstance(result, BrowseResults):
+        _prefetch_tasks[account] = asyncio.create_task(
+            _prefetch(client, account, result, prefetch_budget, library)
+        )
+    return result
+
+
+def invalidate(account: str, media_id: str | None = None) -> None:
+    """Forget cached browse pages after a change the user made (e.g. playback started)."""
+    _cache.invalidate(account, media_id)
+    _cursors.invalidate(account, media_id)
+    for key in [k for k in _album_headers if k[0] == account and (media_id is None or media_id == f"album_{k[1]}")]:
+        del _album_headers[key]
+
+
+def _cancel_prefetch(account: str) -> None:
+    # In-flight loads are shielded inside the cache and still complete; only the
+    # remaining targets are dropped.
+    task = _prefetch_tasks.pop(account, None)
+    if task and not task.done():
+        task.cancel()
+
+
+def _node_kind(media_id: str) -> str:
+    for prefix in ("playlist_", "album_", "artist_"):
+        if media_id.startswith(prefix):
+            return prefix
+    return media_id
+
+
+def _prefetch_cost(options: BrowseOptions) -> int:
+    """API requests a cold load of the node costs (album headers may make it cheaper)."""
+    media_id = options.media_id or ""
+    page = _get_page(options)
+    if media_id.startswith("artist_"):
+        limit = _get_limit(options, default=20)
+        top, _, album_limit = _artist_page_split(page, limit)
+        return 1 + (1 if top else 0) + max(1, -(-album_limit // ARTIST_ALBUMS_MAX_LIMIT))
+    if media_id.startswith("album_"):
+        # get_album embeds the first tracks; later pages add /albums/{id}/tracks.
+        return 1 if page == 1 else 2
+    return 1
+
+
+def _prefetch_targets(account: str, result: BrowseResults) -> list[BrowseOptions]:
+    media = result.media
+    targets = []
+
+    pagination = result.pagination
+    if media and pagination and pagination.page * pagination.limit < pagination.count:
+        targets.append(BrowseOptions(
+            media_id=media.media_id,
+            paging=Paging(page=pagination.page + 1, limit=pagination.limit),
+        ))
 
-    if not media_id or media_id == "root":
-        return await _browse_root(client)
+    # Children are warmed under the limit the remote itself uses for that kind of
+    # node; a kind it has not browsed yet would only be guessed at, so skip it.
+    children = [
+        item.media_id for item in (media.items if media else None) or []
+        if item.can_browse and item.media_id and _is_cacheable(item.media_id)
+        and node_ttl(item.media_id)[0] >= PREFETCH_MIN_TTL
+    ]
+    for media_id in children[:PREFETCH_CHILDREN]:
+        limit = _requested_limits.get((account, _node_kind(media_id)))
+        if limit:
+            targets.append(BrowseOptions(media_id=media_id, paging=Paging(page=1, limit=limit)))
+    return targets
+
+
+async def _prefetch(
+    client: SpotifyClient,
+    account: str,
+    result: BrowseResults,
+    budget: int,
+    library: LibraryIndex | None = None,
+) -> None:
+    for target in _prefetch_targets(account, result):
+        key = (account, target.media_id, _get_page(target), _get_limit(target))
+        if _cache.is_fresh(key):
+            continue
+        cost = _prefetch_cost(target)
+        if cost > budget:
+            break
+        budget -= cost
+        if client.api_budget:
+            await client.api_budget.wait_for_headroom(PREFETCH_MIN_HEADROOM + cost)
+        _LOG.debug("Prefetching %s page %d", target.media_id, key[2])
+        await _cache.get(key, lambda t=target: _browse_node(client, t.media_id, t, None, None, library, account))
+
+
+def _is_cacheable(media_id: str) -> bool:
+    # The root is built from the thumbnail store and never calls the API itself.
+    if any(media_id == item_id for item_id, _, _ in ROOT_ITEMS):
+        return True
+    return media_id.startswith(("playlist_", "album_", "artist_"))
+
+
+async def _browse_node(
+    client: SpotifyClient,
+    media_id: str,
+    options: BrowseOptions,
+    queue: PlaybackQueue | None,
+    root_thumbnails: RootThumbnails | None = None,
+    library: LibraryIndex | None = None,
+    account: str = "",
+) -> BrowseResults | StatusCodes:
+    if media_id == "root":
+        return await _browse_root(client, root_thumbnails)
 
     if media_id == "playlists":
-        return await _browse_playlists(client, options)
+        return await _browse_playlists(client, options, library)
 
     if media_id == "saved_tracks":
-        return await _browse_saved_tracks(client, options)
+        return await _browse_saved_tracks(client, options, library)
 
     if media_id == "saved_albums":
-        return await _browse_saved_albums(client, options)
+        return await _browse_saved_albums(client, options, library)
 
     if media_id == "recently_played":
-        return await _browse_recently_played(client, options)
+        return await _browse_recently_played(client, options, account)
 
     if media_id == "top_tracks":
         return await _browse_top_tracks(client, options)
@@ -63,21 +224,21 @@ async def browse(client: SpotifyClient, options: BrowseOptions) -> BrowseResults
         return await _browse_top_artists(client, options)
 
     if media_id == "followed_artists":
-        return await _browse_followed_artists(client, options)
+        return await _browse_followed_artists(client, options, account)
 
     if media_id == "new_releases":
         return await _browse_new_releases(client, options)
 
     if media_id == "queue":
-        return await _browse_queue(client, options)
+        return await _browse_queue(client, options, queue)
 
     if media_id.startswith("playlist_"):
         playlist_id = media_id[9:]
-        return await _browse_playlist_tracks(client, playlist_id, options)
+        return await _browse_playlist_tracks(client, playlist_id, options, library)
 
     if media_id.startswith("album_"):
         album_id = media_id[6:]
-        return await _browse_album_tracks(client, album_id, options)
+        return await _browse_album_tracks(client, album_id, options, account)
 
     if media_id.startswith("artist_"):
         artist_id = media_id[7:]
@@ -86,7 +247,15 @@ async def browse(client: SpotifyClient, options: BrowseOptions) -> BrowseResults
     return StatusCodes.NOT_FOUND
 
 
-async def search(client: SpotifyClient, options: SearchOptions) -> SearchResults | StatusCodes:
+async def search(
+    client: SpotifyClient,
+    options: SearchOptions,
+    library: LibraryIndex | None = None,
+    session: SearchSession | None = None,
+) -> SearchResults | StatusCodes:
+    """Search Spotify. Matches from the user's own library (when indexed) come first
+    on page 1, followed by the remote results that are not already listed. The
+    pagination count follows the remote results only, so it is the same on every page."""
     if not client or not client.is_authenticated():
         return StatusCodes.SERVICE_UNAVAILABLE
 
@@ -96,46 +265,115 @@ async def search(client: SpotifyClient, options: SearchOptions) -> SearchResults
 
     page = _get_page(options)
     limit = _get_limit(options, default=20)
-    offset = (page - 1) * limit
 
-    data = await client.search(query, limit=limit, offset=offset)
-    if not data:
-        return SearchResults(media=[], pagination=Pagination(page=1, limit=0, count=0))
-
-    results = []
-
-    for track in data.get("tracks", {}).get("items", []):
-        item = _track_to_browse_item(track)
-        if item:
-            results.append(item)
+    types = _search_types(options)
+    local: list[BrowseMediaItem] = []
+    if library is not None:
+        library.schedule_sync(client)
+        if page == 1:
+            local = [item for item in (_item_of_kind(k, i) for k, i in library.search(query, kinds=types)) if item]
+
+    if session is not None:
+        remote = await session.search(
+            query, (page, limit, types), lambda: _remote_search(client, query, page, limit, types)
+        )
+    else:
+        remote = await _remote_search(client, query, page, limit, types)
+    if remote is None:
+        return SearchResults(media=local, pagination=Pagination(page=1, limit=len(local), count=len(local)))
+
+    seen = {item.media_id for item in local}
+    results = local + [item for item in remote[0] if item.media_id not in seen]
+    return SearchResults(
+        media=results,
+        pagination=Pagination(page=page, limit=limit, count=remote[1]),
+    )
 
-    for album in data.get("albums", {}).get("items", []):
-        item = _album_to_browse_item(album)
-        if item:
-            results.append(item)
 
-    for artist in data.get("artists", {}).get("items", []):
-        item = _artist_to_browse_item(artist)
-        if item:
-            results.append(item)
+def _search_types(options: SearchOptions) -> tuple[str, ...]:
+    """Spotify item types the search asked for via its media class filter or type."""
+    wanted = []
+    search_filter = options.filter if hasattr(options, "filter") else None
+    if search_filter and search_filter.media_classes:
+        wanted.extend(str(getattr(c, "value", c)) for c in search_filter.media_classes)
+    if getattr(options, "media_type", None):
+        wanted.append(str(getattr(options.media_type, "value", options.media_type)))
+    types = tuple(t for t in SEARCH_TYPES if t in wanted)
+    return types or SEARCH_TYPES
+
+
+async def _remote_search(
+    client: SpotifyClient, query: str, page: int, limit: int, types: tuple[str, ...]
+) -> tuple[list[BrowseMediaItem], int] | None:
+    """One page of remote results and the pagination count. Each type is paged on its
+    own: a page holds an equal share of ``limit`` per type, fetched in chunks of the
+    API's maximum. The count covers as many pages as the type with the most results
+    needs, so every reachable offset of every type has a page."""
+    per_type = -(-limit // len(types))
+    if len(types) > 1:
+        per_type = min(per_type, SEARCH_MAX_LIMIT)
+    offset = (page - 1) * per_type
+    # The API rejects offset + limit past SEARCH_MAX_OFFSET; the last page is cut short.
+    end = min(offset + per_type, SEARCH_MAX_OFFSET)
+    if offset >= end:
+        return [], 0
+
+    chunks = [
+        client.search(query, limit=min(SEARCH_MAX_LIMIT, end - start), offset=start, types=types)
+        for start in range(offset, end, SEARCH_MAX_LIMIT)
+    ]
+    pages = await asyncio.gather(*chunks)
+    if not any(pages):
+        return None
 
-    for playlist in data.get("playlists", {}).get("items", []):
-        item = _playlist_to_browse_item(playlist)
-        if item:
-            results.append(item)
+    results: list[BrowseMediaItem] = []
+    pages_needed = 0
+    for search_type in types:
+        key = f"{search_type}s"
+        type_total = 0
+        for data in pages:
+            section = (data or {}).get(key) or {}
+            type_total = max(type_total, section.get("total", 0))
+            for obj in section.get("items", []):
+                item = _item_of_kind(search_type, obj) if obj else None
+                if item:
+                    results.append(item)
+        # Pages until the type's results or the reachable offsets run out, whichever is first.
+        pages_needed = max(pages_needed, -(-min(type_total, SEARCH_MAX_OFFSET) // per_type))
+    return results, pages_needed * limit
+
+
+async def _library_page(
+    library: LibraryIndex | None, kind: str, offset: int, limit: int, wrap: str | None = None
+) -> dict | None:
+    """A page from the local library mirror, shaped like the matching API response."""
+    if library is None:
+        return None
+    page = await library.page(kind, offset, limit)
+    if page is None:
+        return None
+    items, total = page
+    if wrap:
+        items = [{wrap: item} for item in items]
+    return {"items": items, "total": total}
 
-    total = sum(
-        data.get(k, {}).get("total", 0) for k in ("tracks", "albums", "artists", "playlists")
-    )
 
-    return SearchResults(
-        media=results,
-        pagination=Pagination(page=page, limit=limit, count=total),
-    )
+def _item_of_kind(kind: str, item: dict) -> BrowseMediaItem | None:
+    converter = {
+        KIND_TRACK: _track_to_browse_item,
+        KIND_ALBUM: _album_to_browse_item,
+        KIND_ARTIST: _artist_to_browse_item,
+        KIND_PLAYLIST: _playlist_to_browse_item,
+    }[kind]
+    return converter(item)
 
 
-async def _browse_root(client: SpotifyClient) -> BrowseResults:
-    thumbnails = await _fetch_root_thumbnails(client)
+async def _browse_root(client: SpotifyClient, root_thumbnails: RootThumbnails | None) -> BrowseResults:
+    if root_thumbnails is None:
+        thumbnails = {node: proxied(url, ARTWORK_TILE) for node, url in (await fetch_root_thumbnails(client)).items()}
+    else:
+        thumbnails = root_thumbnails.get()
+        root_thumbnails.refresh_if_stale(client)
 
     items = []
     for item_id, title, media_class in ROOT_ITEMS:
@@ -163,52 +401,16 @@ async def _browse_root(client: SpotifyClient) -> BrowseResults:
     )
 
 
-async def _fetch_root_thumbnails(client: SpotifyClient) -> dict[str, str | None]:
-    async def _first_image(coro, *keys) -> tuple[str, str | None]:
-        try:
-            data = await coro
-            if not data:
-                return keys[0], None
-            obj = data
-            for k in keys[1:]:
-                obj = obj.get(k, {}) if isinstance(obj, dict) else {}
-            items = obj.get("items", []) if isinstance(obj, dict) else obj
-            if isinstance(items, list):
-                for item in items:
-                    track = item.get("track", item) if isinstance(item, dict) else item
-                    if isinstance(track, dict):
-                        images = track.get("images") or track.get("album", {}).get("images", [])
-                        if images:
-                            return keys[0], images[0].get("url")
-        except Exception:
-            pass
-        return keys[0], None
-
-    results = await asyncio.gather(
-        _first_image(client.get_user_playlists(limit=1, offset=0), "playlists"),
-        _first_image(client.get_saved_tracks(limit=1, offset=0), "saved_tracks"),
-        _first_image(client.get_saved_albums(limit=1, offset=0), "saved_albums"),
-        _first_image(client.get_recently_played(limit=1), "recently_played"),
-        _first_image(client.get_top_tracks(limit=1, offset=0), "top_tracks"),
-        _first_image(client.get_top_artists(limit=1, offset=0), "top_artists"),
-        _first_image(client.get_followed_artists(limit=1), "followed_artists", "artists"),
-        _first_image(client.get_new_releases(limit=1, offset=0), "new_releases", "albums"),
-        return_exceptions=True,
-    )
-
-    thumbnails: dict[str, str | None] = {}
-    for result in results:
-        if isinstance(result, tuple):
-            thumbnails[result[0]] = result[1]
-    return thumbnails
-
-
-async def _browse_playlists(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
+async def _browse_playlists(
+    client: SpotifyClient, options: BrowseOptions, library: LibraryIndex | None = None
+) -> BrowseResults:
     page = _get_page(options)
     limit = _get_limit(options)
     offset = (page - 1) * limit
 
-    data = await client.get_user_playlists(limit=limit, offset=offset)
+    data = await _library_page(library, KIND_PLAYLIST, offset, limit)
+    if data is None:
+        data = await client.get_user_playlists(limit=limit, offset=offset)
     if not data:
         return _empty_browse("playlists", "Playlists", page, limit)
 
@@ -233,12 +435,16 @@ async def _browse_playlists(client: SpotifyClient, options: BrowseOptions) -> Br
     )
 
 
-async def _browse_saved_tracks(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
+async def _browse_saved_tracks(
+    client: SpotifyClient, options: BrowseOptions, library: LibraryIndex | None = None
+) -> BrowseResults:
     page = _get_page(options)
     limit = _get_limit(options)
     offset = (page - 1) * limit
 
-    data = await client.get_saved_tracks(limit=limit, offset=offset)
+    data = await _library_page(library, KIND_TRACK, offset, limit, wrap="track")
+    if data is None:
+        data = await client.get_saved_tracks(limit=limit, offset=offset)
     if not data:
         return _empty_browse("saved_tracks", "Liked Songs", page, limit)
 
@@ -264,12 +470,16 @@ async def _browse_saved_tracks(client: SpotifyClient, options: BrowseOptions) ->
     )
 
 
-async def _browse_saved_albums(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
+async def _browse_saved_albums(
+    client: SpotifyClient, options: BrowseOptions, library: LibraryIndex | None = None
+) -> BrowseResults:
     page = _get_page(options)
     limit = _get_limit(options)
     offset = (page - 1) * limit
 
-    data = await client.get_saved_albums(limit=limit, offset=offset)
+    data = await _library_page(library, KIND_ALBUM, offset, limit, wrap="album")
+    if data is None:
+        data = await client.get_saved_albums(limit=limit, offset=offset)
     if not data:
         return _empty_browse("saved_albums", "Albums", page, limit)
 
@@ -295,12 +505,18 @@ async def _browse_saved_albums(client: SpotifyClient, options: BrowseOptions) ->
     )
 
 
-async def _browse_recently_played(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
+async def _browse_recently_played(client: SpotifyClient, options: BrowseOptions, account: str = "") -> BrowseResults:
+    page = _get_page(options)
     limit = _get_limit(options)
 
-    data = await client.get_recently_played(limit=limit)
+    data = await _cursor_page(
+        account, "recently_played", page, limit,
+        lambda before: client.get_recently_played(limit=limit, before=before),
+        lambda data: data,
+        "before",
+    )
     if not data:
-        return _empty_browse("recently_played", "Recently Played", 1, limit)
+        return _empty_browse("recently_played", "Recently Played", page, limit)
 
     items = []
     for entry in data.get("items", []):
@@ -319,7 +535,7 @@ async def _browse_recently_played(client: SpotifyClient, options: BrowseOptions)
             can_browse=True,
             items=items,
         ),
-        pagination=Pagination(page=1, limit=len(items), count=len(items)),
+        pagination=Pagination(page=page, limit=limit, count=_cursor_count(data, page, limit)),
     )
 
 
@@ -381,21 +597,26 @@ async def _browse_top_artists(client: SpotifyClient, options: BrowseOptions) ->
     )
 
 
-async def _browse_followed_artists(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
+async def _browse_followed_artists(client: SpotifyClient, options: BrowseOptions, account: str = "") -> BrowseResults:
+    page = _get_page(options)
     limit = _get_limit(options)
 
-    data = await client.get_followed_artists(limit=limit)
-    if not data:
-        return _empty_browse("followed_artists", "Artists", 1, limit)
+    artists_data = await _cursor_page(
+        account, "followed_artists", page, limit,
+        lambda after: client.get_followed_artists(limit=limit, after=after),
+        lambda data: data.get("artists"),
+        "after",
+    )
+    if not artists_data:
+        return _empty_browse("followed_artists", "Artists", page, limit)
 
-    artists_data = data.get("artists", {})
     items = []
     for artist in artists_data.get("items", []):
         item = _artist_to_browse_item(artist)
         if item:
             items.append(item)
 
-    total = artists_data.get("total", len(items))
+    total = artists_data.get("total") or _cursor_count(artists_data, page, limit)
     return BrowseResults(
         media=BrowseMediaItem(
             title="Artists",
@@ -405,10 +626,50 @@ async def _browse_followed_artists(client: SpotifyClient, options: BrowseOptions
             can_browse=True,
             items=items,
         ),
-        pagination=Pagination(page=1, limit=len(items), count=total),
+        pagination=Pagination(page=page, limit=limit, count=total),
     )
 
 
+async def _cursor_page(
+    account: str,
+    media_id: str,
+    page: int,
+    limit: int,
+    fetch: Callable[[str | None], Awaitable[dict[str, Any] | None]],
+    unwrap: Callable[[dict[str, Any]], dict[str, Any] | None],
+    cursor_name: str,
+) -> dict[str, Any] | None:
+    """Fetch ``page`` of a cursor-paged node, walking from the nearest known cursor.
+
+    ``unwrap`` selects the paging object (with ``items``, ``next`` and ``cursors``)
+    from the response; the cursor of every page passed on the way is remembered.
+    """
+    key = (account, media_id, limit)
+    known, cursor = _cursors.nearest(key, page)
+    if page - known > CURSOR_MAX_WALK:
+        _LOG.debug("%s page %d is %d pages past the last known cursor", media_id, page, page - known)
+        return None
+    while True:
+        data = await fetch(cursor)
+        paging = unwrap(data) if data else None
+        if not paging:
+            return None
+        cursor = (paging.get("cursors") or {}).get(cursor_name) if paging.get("next") else None
+        if cursor:
+            _cursors.record(key, known + 1, cursor)
+        if known == page:
+            return paging
+        if not cursor:
+            return None
+        known += 1
+
+
+def _cursor_count(paging: dict[str, Any], page: int, limit: int) -> int:
+    # Cursor pages carry no total; one item past this page signals that more follow.
+    count = (page - 1) * limit + len(paging.get("items") or [])
+    return count + 1 if paging.get("next") else count
+
+
 async def _browse_new_releases(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
     page = _get_page(options)
     limit = _get_limit(options, default=20)
@@ -438,8 +699,10 @@ async def _browse_new_releases(client: SpotifyClient, options: BrowseOptions) ->
     )
 
 
-async def _browse_queue(client: SpotifyClient, options: BrowseOptions) -> BrowseResults:
-    data = await client.get_queue()
+async def _browse_queue(
+    client: SpotifyClient, options: BrowseOptions, queue: PlaybackQueue | None = None
+) -> BrowseResults:
+    data = await queue.get(client) if queue else await client.get_queue()
     if not data:
         return _empty_browse("queue", "Queue", 1, 50)
 
@@ -482,15 +745,26 @@ async def _browse_queue(client: SpotifyClient, options: BrowseOptions) -> Browse
 
 
 async def _browse_playlist_tracks(
-    client: SpotifyClient, playlist_id: str, options: BrowseOptions
+    client: SpotifyClient, playlist_id: str, options: BrowseOptions, library: LibraryIndex | None = None
 ) -> BrowseResults:
-    data = await client.get_playlist(playlist_id)
+    data = None
+    if library is not None:
+        tracks = await library.playlist_tracks(playlist_id)
+        if tracks is not None:
+            playlist = library.item(KIND_PLAYLIST, playlist_id) or {}
+            data = dict(playlist, tracks={
+                "items": [{"track": dict(track, type="track")} for track in tracks], "total": len(tracks)
+            })
+    if data is None:
+        data = await client.get_playlist(playlist_id)
+        if data and library is not None:
+            await library.store_playlist(playlist_id, data)
     if not data:
         return _empty_browse(f"playlist_{playlist_id}", "Playlist", 1, 50)
 
     playlist_name = data.get("name", "Playlist")
     playlist_images = data.get("images", [])
-    playlist_thumbnail = playlist_images[0]["url"] if playlist_images else None
+    playlist_thumbnail = pick_image(playlist_images, ARTWORK_TILE)
 
     tracks_data = data.get("tracks") or data.get("items") or {}
     items = []
@@ -517,21 +791,63 @@ async def _browse_playlist_tracks(
     )
 
 
-async def _browse_album_tracks(
-    client: SpotifyClient, album_id: str, options: BrowseOptions
-) -> BrowseResults:
+async def _album_header(client: SpotifyClient, album_id: str, account: str = "") -> dict[str, Any] | None:
+    """Album name, artwork, artists and first tracks page, fetched once per account and
+    album and kept as long as album pages are cached."""
+    key = (account, album_id)
+    entry = _album_headers.get(key)
+    if entry is not None:
+        ttl, stale = node_ttl("album_")
+        if time.monotonic() - entry[0] <= ttl + stale:
+            _album_headers.move_to_end(key)
+            return entry[1]
+        del _album_headers[key]
     data = await client.get_album(album_id)
     if not data:
-        return _empty_browse(f"album_{album_id}", "Album", 1, 50)
+        return None
+    tracks = data.get("tracks") or {}
+    header = {
+        "name": data.get("name", "Album"),
+        "images": data.get("images", []),
+        "artists": data.get("artists", []),
+        "tracks": tracks.get("items", []),
+        "total": tracks.get("total", len(tracks.get("items", []))),
+    }
+    _album_headers[key] = (time.monotonic(), header)
+    if len(_album_headers) > ALBUM_HEADERS_MAX:
+        _album_headers.popitem(last=False)
+    return header
 
-    album_name = data.get("name", "Album")
-    album_images = data.get("images", [])
-    album_thumbnail = album_images[0]["url"] if album_images else None
-    album_artists = ", ".join(a.get("name", "") for a in data.get("artists", []))
 
-    tracks_data = data.get("tracks", {})
+async def _browse_album_tracks(
+    client: SpotifyClient, album_id: str, options: BrowseOptions, account: str = ""
+) -> BrowseResults:
+    page = _get_page(options)
+    limit = min(_get_limit(options), ALBUM_TRACKS_MAX_LIMIT)
+    offset = (page - 1) * limit
+
+    header = await _album_header(client, album_id, account)
+    if not header:
+        return _empty_browse(f"album_{album_id}", "Album", page, limit)
+
+    album_name = header["name"]
+    album_thumbnail = pick_image(header["images"], ARTWORK_TILE)
+    album_artists = ", ".join(a.get("name", "") for a in header["artists"])
+    total = header["total"]
+
+    # get_album embeds the first tracks; only pages past them need /albums/{id}/tracks.
+    embedded = header["tracks"]
+    if offset + limit <= len(embedded) or len(embedded) >= total or offset >= total:
+        tracks = embedded[offset:offset + limit]
+    else:
+        data = await client.get_album_tracks(album_id, limit=limit, offset=offset)
+        if not data:
+            return _empty_browse(f"album_{album_id}", album_name, page, limit)
+        tracks = data.get("items", [])
+        total = data.get("total", total)
+
     items = []
-    for track in tracks_data.get("items", []):
+    for track in tracks:
         track_id = track.get("id", "")
         track_name = track.get("name", "")
         track_num = track.get("track_number", 0)
@@ -555,7 +871,6 @@ async def _browse_album_tracks(
             duration=duration_ms // 1000,
         ))
 
-    total = tracks_data.get("total", len(items))
     return BrowseResults(
         media=BrowseMediaItem(
             title=album_name,
@@ -567,33 +882,61 @@ async def _browse_album_tracks(
             thumbnail=album_thumbnail,
             items=items,
         ),
-        pagination=Pagination(page=1, limit=total, count=total),
+        pagination=Pagination(page=page, limit=limit, count=total),
     )
 
 
+def _artist_page_split(page: int, limit: int) -> tuple[bool, int, int]:
+    """Whether an artist page shows top tracks, and the album offset and count it shows.
+
+    The artist listing is the top tracks followed by the albums. The top tracks always
+    take ``ARTIST_TOP_TRACKS`` positions, so album offsets and the count are the same
+    on every page without knowing how many top tracks the artist really has.
+    """
+    offset = (page - 1) * limit
+    top_slots = max(0, min(limit, ARTIST_TOP_TRACKS - offset))
+    return top_slots > 0, max(0, offset - ARTIST_TOP_TRACKS), limit - top_slots
+
+
 async def _browse_artist(
     client: SpotifyClient, artist_id: str, options: BrowseOptions
 ) -> BrowseResults:
-    artist_data = await client.get_artist(artist_id)
-    if not artist_data:
-        return _empty_browse(f"artist_{artist_id}", "Artist", 1, 50)
+    page = _get_page(options)
+    limit = _get_limit(options, default=20)
+    with_top, album_offset, album_limit = _artist_page_split(page, limit)
+
+    # Albums are paged by the API in small chunks; fetch every chunk of this page
+    # together with the artist and the top tracks in one round trip.
+    chunk = ARTIST_ALBUMS_MAX_LIMIT
+    album_requests = [
+        client.get_artist_albums(artist_id, limit=min(chunk, album_limit - start), offset=album_offset + start)
+        for start in range(0, album_limit, chunk)
+    ] or [client.get_artist_albums(artist_id, limit=1)]  # a page of top tracks still needs the album total
+    top_request = client.get_artist_top_tracks(artist_id) if with_top else _none()
+    artist_data, top_tracks, *album_pages = await asyncio.gather(
+        client.get_artist(artist_id), top_request, *album_requests, return_exceptions=True
+    )
+    if not artist_data or isinstance(artist_data, BaseException):
+        return _empty_browse(f"artist_{artist_id}", "Artist", page, limit)
 
     artist_name = artist_data.get("name", "Artist")
     artist_images = artist_data.get("images", [])
-    artist_thumbnail = artist_images[0]["url"] if artist_images else None
+    artist_thumbnail = pick_image(artist_images, ARTWORK_TILE)
 
     items = []
-
-    top_tracks = await client.get_artist_top_tracks(artist_id)
-    if top_tracks:
-        for track in top_tracks.get("tracks", []):
+    if top_tracks and not isinstance(top_tracks, BaseException):
+        offset = (page - 1) * limit
+        for track in top_tracks.get("tracks", [])[offset:offset + limit]:
             item = _track_to_browse_item(track)
             if item:
                 items.append(item)
 
-    albums = await client.get_artist_albums(artist_id, limit=20)
-    if albums:
-        for album in albums.get("items", []):
+    album_total = 0
+    for albums in album_pages:
+        if not albums or isinstance(albums, BaseException):
+            continue
+        album_total = max(album_total, albums.get("total", 0))
+        for album in albums.get("items", []) if album_limit else []:
             item = _album_to_browse_item(album)
             if item:
                 items.append(item)
@@ -608,24 +951,34 @@ async def _browse_artist(
             thumbnail=artist_thumbnail,
             items=items,
         ),
-        pagination=Pagination(page=1, limit=len(items), count=len(items)),
+        pagination=Pagination(page=page, limit=limit, count=ARTIST_TOP_TRACKS + album_total),
     )
 
 
+async def _none() -> None:
+    return None
+
+
 def _track_to_browse_item(track: dict) -> BrowseMediaItem | None:
     track_id = track.get("id", "")
     track_name = track.get("name", "")
     if not track_id or not track_name:
         return None
 
-    artists = ", ".join(a.get("name", "") for a in track.get("artists", []))
     album = track.get("album", {})
-    album_name = album.get("name", "")
     images = album.get("images", [])
-    thumbnail = images[0]["url"] if images else None
+    # Simplified track objects carry no album art; keep them apart from full ones.
+    key = ("track", track_id, track_name, bool(images), track.get("is_playable", True))
+    cached = _items.get(key)
+    if cached is not None:
+        return cached
+
+    artists = ", ".join(a.get("name", "") for a in track.get("artists", []))
+    album_name = album.get("name", "")
+    thumbnail = pick_image(images)
     duration_ms = track.get("duration_ms", 0)
 
-    return BrowseMediaItem(
+    return _items.put(key, BrowseMediaItem(
         title=track_name,
         media_class=MediaClass.TRACK,
         media_type=MediaContentType.TRACK,
@@ -636,7 +989,7 @@ def _track_to_browse_item(track: dict) -> BrowseMediaItem | None:
         artist=artists,
         album=album_name,
         duration=duration_ms // 1000,
-    )
+    ))
 
 
 def _album_to_browse_item(album: dict) -> BrowseMediaItem | None:
@@ -645,11 +998,16 @@ def _album_to_browse_item(album: dict) -> BrowseMediaItem | None:
     if not album_id or not album_name:
         return None
 
-    artists = ", ".join(a.get("name", "") for a in album.get("artists", []))
     images = album.get("images", [])
-    thumbnail = images[0]["url"] if images else None
+    key = ("album", album_id, album_name, bool(images))
+    cached = _items.get(key)
+    if cached is not None:
+        return cached
+
+    artists = ", ".join(a.get("name", "") for a in album.get("artists", []))
+    thumbnail = pick_image(images)
 
-    return BrowseMediaItem(
+    return _items.put(key, BrowseMediaItem(
         title=album_name,
         media_class=MediaClass.ALBUM,
         media_type=MediaContentType.ALBUM,
@@ -658,7 +1016,7 @@ def _album_to_browse_item(album: dict) -> BrowseMediaItem | None:
         can_play=True,
         thumbnail=thumbnail,
         artist=artists,
-    )
+    ))
 
 
 def _artist_to_browse_item(artist: dict) -> BrowseMediaItem | None:
@@ -668,9 +1026,14 @@ def _artist_to_browse_item(artist: dict) -> BrowseMediaItem | None:
         return None
 
     images = artist.get("images", [])
-    thumbnail = images[0]["url"] if images else None
+    key = ("artist", artist_id, artist_name, bool(images))
+    cached = _items.get(key)
+    if cached is not None:
+        return cached
+
+    thumbnail = pick_image(images)
 
-    return BrowseMediaItem(
+    return _items.put(key, BrowseMediaItem(
         title=artist_name,
         media_class=MediaClass.ARTIST,
         media_type=MediaContentType.ARTIST,
@@ -678,7 +1041,7 @@ def _artist_to_browse_item(artist: dict) -> BrowseMediaItem | None:
         can_browse=True,
         can_play=False,
         thumbnail=thumbnail,
-    )
+    ))
 
 
 def _playlist_to_browse_item(playlist: dict) -> BrowseMediaItem | None:
@@ -689,11 +1052,17 @@ def _playlist_to_browse_item(playlist: dict) -> BrowseMediaItem | None:
     if not playlist_id or not playlist_name:
         return None
 
+    # snapshot_id changes with every edit, which may also change the mosaic cover.
+    key = ("playlist", playlist_id, playlist_name, playlist.get("snapshot_id", ""))
+    cached = _items.get(key)
+    if cached is not None:
+        return cached
+
     images = playlist.get("images", [])
-    thumbnail = images[0]["url"] if images else None
+    thumbnail = pick_image(images)
     owner = playlist.get("owner", {}).get("display_name", "")
 
-    return BrowseMediaItem(
+    return _items.put(key, BrowseMediaItem(
         title=playlist_name,
         media_class=MediaClass.PLAYLIST,
         media_type=MediaContentType.PLAYLIST,
@@ -702,7 +1071,7 @@ def _playlist_to_browse_item(playlist: dict) -> BrowseMediaItem | None:
         can_play=True,
         thumbnail=thumbnail,
         subtitle=f"by {owner}" if owner else None,
-    )
+    ))
 
 
 def _get_page(options) -> int:
@@ -1,14 +1,22 @@
 """Spotify Web API client. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
 from __future__ import annotations
 
+import asyncio
 import base64
+import heapq
+import itertools
 import logging
 import ssl
+import time
 import urllib.parse
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import aiohttp
-import certifi
+
+from uc_intg_spotify.artwork import ARTWORK_NOW_PLAYING, pick_image
+
+if TYPE_CHECKING:
+    from uc_intg_spotify.scheduler import ApiBudget
 
 _LOG = logging.getLogger(__name__)
 
@@ -18,6 +26,23 @@ SPOTIFY_API_BASE_URL = "https://api.spotify.com/v1"
 
 REDIRECT_URI = "https://example.com/callback"
 
+LANE_CONTROL = "control"
+LANE_POLL = "poll"
+LANE_LIBRARY = "library"
+_LANE_PRIORITY = {LANE_CONTROL: 0, LANE_POLL: 1, LANE_LIBRARY: 2}
+
+CONNECTION_LIMIT = 6
+
+ARTIST_ALBUM_GROUPS = "album,single,appears_on,compilation"
+ARTIST_ALBUMS_MAX_LIMIT = 10
+ARTIST_TOP_TRACKS = 10  # /artists/{id}/top-tracks returns at most this many
+ALBUM_TRACKS_MAX_LIMIT = 50
+
+SEARCH_TYPES = ("track", "album", "artist", "playlist")
+SEARCH_MAX_LIMIT = 10
+SEARCH_MAX_OFFSET = 1000  # offset + limit may not exceed this
+CONTROL_RESERVED_SLOTS = 2
+
 
 class SpotifyAuthError(Exception):
     """Raised when the refresh token is permanently invalid and re-authentication is required."""
@@ -37,6 +62,70 @@ SCOPES = [
 ]
 
 
+class _RequestGate:
+    """Admits Web API requests by lane priority.
+
+    At most ``CONNECTION_LIMIT`` requests are in flight; the last
+    ``CONTROL_RESERVED_SLOTS`` of them are only available to the control lane, so
+    playback commands never wait behind a burst of browse or poll traffic. Queued
+    requests are admitted by lane priority, then arrival order.
+    """
+
+    def __init__(self, limit: int = CONNECTION_LIMIT, reserved: int = CONTROL_RESERVED_SLOTS) -> None:
+        self._limit = limit
+        self._reserved = reserved
+        self._active = 0
+        self._waiters: list[tuple[int, int, str, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self.stats: dict[str, dict[str, float]] = {
+            lane: {"requests": 0, "queued": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            for lane in _LANE_PRIORITY
+        }
+
+    def _capacity(self, lane: str) -> int:
+        return self._limit if lane == LANE_CONTROL else self._limit - self._reserved
+
+    async def acquire(self, lane: str) -> None:
+        started = time.monotonic()
+        priority = _LANE_PRIORITY[lane]
+        stats = self.stats[lane]
+        stats["requests"] += 1
+
+        head_priority = self._waiters[0][0] if self._waiters else None
+        if self._active < self._capacity(lane) and (head_priority is None or head_priority > priority):
+            self._active += 1
+            return
+
+        stats["queued"] += 1
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), lane, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+        wait_ms = (time.monotonic() - started) * 1000
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        if wait_ms > 250:
+            _LOG.debug("Request on %s lane queued for %.0f ms", lane, wait_ms)
+
+    def release(self) -> None:
+        self._active -= 1
+        while self._waiters:
+            _, _, lane, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self._capacity(lane):
+                break
+            heapq.heappop(self._waiters)
+            self._active += 1
+            future.set_result(None)
+
+
 class SpotifyClient:
     """Spotify Web API client with OAuth2 authentication."""
 
@@ -47,6 +136,8 @@ class SpotifyClient:
         self._client_secret = ""
         self._session: aiohttp.ClientSession | None = None
         self._on_token_refresh: Any = None
+        self._budget: ApiBudget | None = None
+        self._gate = _RequestGate()
 
     def set_credentials(self, client_id: str, client_secret: str) -> None:
         self._client_id = client_id
@@ -59,6 +150,14 @@ class SpotifyClient:
     def set_token_refresh_callback(self, callback: Any) -> None:
         self._on_token_refresh = callback
 
+    def set_api_budget(self, budget: ApiBudget | None) -> None:
+        """Account Web API requests against a budget shared per client_id."""
+        self._budget = budget
+
+    @property
+    def api_budget(self) -> ApiBudget | None:
+        return self._budget
+
     def is_authenticated(self) -> bool:
         return bool(self._access_token and self._refresh_token)
 
@@ -66,15 +165,38 @@ class SpotifyClient:
     def access_token(self) -> str:
         return self._access_token
 
+    def lane_stats(self) -> dict[str, dict[str, float]]:
+        """Per-lane request counts and queueing delay (ms) since the client was created."""
+        result = {}
+        for lane, stats in self._gate.stats.items():
+            queued = stats["queued"]
+            result[lane] = {
+                **stats,
+                "avg_wait_ms": stats["total_wait_ms"] / queued if queued else 0.0,
+            }
+        return result
+
     async def ensure_fresh_token(self) -> bool:
         """Force a token refresh so callers outside the Web API path (e.g. Zeroconf
         device activation) use a valid access token."""
         return await self.refresh_access_token() is not None
 
+    async def preconnect(self) -> None:
+        """Open the session and a pooled TLS connection to the Web API host, so the
+        first real request skips DNS and the handshake. Not a Web API call."""
+        try:
+            session = await self._get_session()
+            async with session.head(SPOTIFY_API_BASE_URL, allow_redirects=False):
+                pass
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOG.debug("Preconnect to Spotify API failed: %s", err)
+
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
+            import certifi  # resolving the CA bundle path is slow; defer it to first use
+
             ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
+            connector = aiohttp.TCPConnector(ssl=ssl_context, limit_per_host=CONNECTION_LIMIT)
             timeout = aiohttp.ClientTimeout(total=30, connect=10)
             self._session = aiohttp.ClientSession(
                 connector=connector,
@@ -165,12 +287,24 @@ class SpotifyClient:
             return None
 
     async def _api_request(
-        self, method: str, endpoint: str, **kwargs: Any
+        self, method: str, endpoint: str, lane: str = LANE_LIBRARY, **kwargs: Any
     ) -> dict[str, Any] | None:
         if not self._access_token:
             _LOG.error("Not authenticated")
             return None
 
+        if self._budget:
+            self._budget.consume()
+
+        await self._gate.acquire(lane)
+        try:
+            return await self._send_request(method, endpoint, **kwargs)
+        finally:
+            self._gate.release()
+
+    async def _send_request(
+        self, method: str, endpoint: str, **kwargs: Any
+    ) -> dict[str, Any] | None:
         try:
             session = await self._get_session()
             headers = kwargs.pop("headers", {})
@@ -178,28 +312,29 @@ class SpotifyClient:
 
             url = f"{SPOTIFY_API_BASE_URL}{endpoint}"
 
-            async with session.request(method, url, headers=headers, **kwargs) as response:
-                if response.status == 401:
-                    token_data = await self.refresh_access_token()
-                    if not token_data:
-                        return None
-                    headers["Authorization"] = f"Bearer {self._access_token}"
-                    async with session.request(method, url, headers=headers, **kwargs) as retry:
-                        if 200 <= retry.status < 300:
-                            return {} if retry.status == 204 else await retry.json()
+            for attempt in range(2):
+                async with session.request(method, url, headers=headers, **kwargs) as response:
+                    if response.status == 401 and attempt == 0:
+                        # Free the pooled connection before refreshing and retrying, so
+                        # retries never wait on a per-host slot their own request holds.
+                        response.release()
+                    else:
+                        if 200 <= response.status < 300:
+                            if response.status == 204:
+                                return {}
+                            try:
+                                return await response.json()
+                            except (aiohttp.ContentTypeError, ValueError):
+                                return {}
+
+                        body = await response.text()
+                        _LOG.error("API %s %s failed: %s - %s", method, endpoint, response.status, body[:500])
                         return None
-
-                if 200 <= response.status < 300:
-                    if response.status == 204:
-                        return {}
-                    try:
-                        return await response.json()
-                    except (aiohttp.ContentTypeError, ValueError):
-                        return {}
-
-                body = await response.text()
-                _LOG.error("API %s %s failed: %s - %s", method, endpoint, response.status, body[:500])
-                return None
+                token_data = await self.refresh_access_token()
+                if not token_data:
+                    return None
+                headers["Authorization"] = f"Bearer {self._access_token}"
+            return None
         except SpotifyAuthError:
             raise
         except Exception as e:
@@ -209,7 +344,7 @@ class SpotifyClient:
     # ── Playback State ──
 
     async def get_playback_state(self) -> dict[str, Any] | None:
-        data = await self._api_request("GET", "/me/player")
+        data = await self._api_request("GET", "/me/player", lane=LANE_POLL)
         if not data:
             return None
 
@@ -234,7 +369,7 @@ class SpotifyClient:
             "album": album.get("name", ""),
             "duration_ms": item.get("duration_ms", 0) if item else 0,
             "progress_ms": data.get("progress_ms", 0),
-            "image_url": images[0].get("url", "") if images else "",
+            "image_url": pick_image(images, ARTWORK_NOW_PLAYING) or "",
             "uri": item.get("uri", "") if item else "",
             "context": data.get("context"),
             "currently_playing_type": data.get("currently_playing_type", "unknown"),
@@ -242,13 +377,13 @@ class SpotifyClient:
         }
 
     async def get_available_devices(self) -> list[dict[str, Any]]:
-        data = await self._api_request("GET", "/me/player/devices")
+        data = await self._api_request("GET", "/me/player/devices", lane=LANE_POLL)
         if data and "devices" in data:
             return data["devices"]
         return []
 
     async def get_queue(self) -> dict[str, Any] | None:
-        return await self._api_request("GET", "/me/player/queue")
+        return await self._api_request("GET", "/me/player/queue", lane=LANE_POLL)
 
     # ── Playback Control ──
 
@@ -256,46 +391,46 @@ class SpotifyClient:
         endpoint = "/me/player/play"
         if device_id:
             endpoint += f"?device_id={device_id}"
-        return await self._api_request("PUT", endpoint) is not None
+        return await self._api_request("PUT", endpoint, lane=LANE_CONTROL) is not None
 
     async def pause(self) -> bool:
-        return await self._api_request("PUT", "/me/player/pause") is not None
+        return await self._api_request("PUT", "/me/player/pause", lane=LANE_CONTROL) is not None
 
     async def play_pause(self, is_playing: bool) -> bool:
         endpoint = "/me/player/pause" if is_playing else "/me/player/play"
-        return await self._api_request("PUT", endpoint) is not None
+        return await self._api_request("PUT", endpoint, lane=LANE_CONTROL) is not None
 
     async def next_track(self) -> bool:
-        return await self._api_request("POST", "/me/player/next") is not None
+        return await self._api_request("POST", "/me/player/next", lane=LANE_CONTROL) is not None
 
     async def previous_track(self) -> bool:
-        return await self._api_request("POST", "/me/player/previous") is not None
+        return await self._api_request("POST", "/me/player/previous", lane=LANE_CONTROL) is not None
 
     async def set_volume(self, volume_percent: int, device_id: str | None = None) -> bool:
         volume_percent = max(0, min(100, volume_percent))
         endpoint = f"/me/player/volume?volume_percent={volume_percent}"
         if device_id:
             endpoint += f"&device_id={device_id}"
-        return await self._api_request("PUT", endpoint) is not None
+        return await self._api_request("PUT", endpoint, lane=LANE_CONTROL) is not None
 
     async def seek(self, position_ms: int) -> bool:
         return await self._api_request(
-            "PUT", f"/me/player/seek?position_ms={position_ms}"
+            "PUT", f"/me/player/seek?position_ms={position_ms}", lane=LANE_CONTROL
         ) is not None
 
     async def set_shuffle(self, state: bool) -> bool:
         return await self._api_request(
-            "PUT", f"/me/player/shuffle?state={'true' if state else 'false'}"
+            "PUT", f"/me/player/shuffle?state={'true' if state else 'false'}", lane=LANE_CONTROL
         ) is not None
 
     async def set_repeat(self, state: str) -> bool:
         return await self._api_request(
-            "PUT", f"/me/player/repeat?state={state}"
+            "PUT", f"/me/player/repeat?state={state}", lane=LANE_CONTROL
         ) is not None
 
     async def add_to_queue(self, uri: str) -> bool:
         encoded = urllib.parse.quote(uri)
-        return await self._api_request("POST", f"/me/player/queue?uri={encoded}") is not None
+        return await self._api_request("POST", f"/me/player/queue?uri={encoded}", lane=LANE_CONTROL) is not None
 
     async def play_uri(self, uri: str, device_id: str | None = None) -> bool:
         if uri.startswith("spotify:track:"):
@@ -307,11 +442,11 @@ class SpotifyClient:
         if device_id:
             endpoint = f"/me/player/play?device_id={device_id}"
 
-        return await self._api_request("PUT", endpoint, json=body) is not None
+        return await self._api_request("PUT", endpoint, lane=LANE_CONTROL, json=body) is not None
 
     async def transfer_playback(self, device_id: str, play: bool = True) -> bool:
         return await self._api_request(
-            "PUT", "/me/player", json={"device_ids": [device_id], "play": play}
+            "PUT", "/me/player", lane=LANE_CONTROL, json={"device_ids": [device_id], "play": play}
         ) is not None
 
     # ── Browse / Library ──
@@ -347,6 +482,14 @@ class SpotifyClient:
             "GET", f"/albums/{album_id}?market=from_token"
         )
 
+    async def get_album_tracks(
+        self, album_id: str, limit: int = 50, offset: int = 0
+    ) -> dict[str, Any] | None:
+        limit = max(1, min(limit, ALBUM_TRACKS_MAX_LIMIT))
+        return await self._api_request(
+            "GET", f"/albums/{album_id}/tracks?limit={limit}&offset={offset}&market=from_token"
+        )
+
     async def get_artist(self, artist_id: str) -> dict[str, Any] | None:
         return await self._api_request("GET", f"/artists/{artist_id}")
 
@@ -356,16 +499,21 @@ class SpotifyClient:
         )
 
     async def get_artist_albums(
-        self, artist_id: str, limit: int = 20, offset: int = 0
+        self, artist_id: str, limit: int = 10, offset: int = 0,
+        include_groups: str = ARTIST_ALBUM_GROUPS,
     ) -> dict[str, Any] | None:
+        limit = max(1, min(limit, ARTIST_ALBUMS_MAX_LIMIT))
         return await self._api_request(
             "GET",
-            f"/artists/{artist_id}/albums?include_groups=album,single&limit={limit}&offset={offset}",
+            f"/artists/{artist_id}/albums?include_groups={include_groups}&limit={limit}&offset={offset}",
         )
 
-    async def get_recently_played(self, limit: int = 50) -> dict[str, Any] | None:
+    async def get_recently_played(
+        self, limit: int = 50, before: str | None = None
+    ) -> dict[str, Any] | None:
+        cursor = f"&before={urllib.parse.quote(before)}" if before else ""
         return await self._api_request(
-            "GET", f"/me/player/recently-played?limit={limit}"
+            "GET", f"/me/player/recently-played?limit={limit}{cursor}"
         )
 
     async def get_top_artists(
@@ -382,9 +530,12 @@ class SpotifyClient:
             "GET", f"/me/top/tracks?limit={limit}&offset={offset}"
         )
 
-    async def get_followed_artists(self, limit: int = 50) -> dict[str, Any] | None:
+    async def get_followed_artists(
+        self, limit: int = 50, after: str | None = None
+    ) -> dict[str, Any] | None:
+        cursor = f"&after={urllib.parse.quote(after)}" if after else ""
         return await self._api_request(
-            "GET", f"/me/following?type=artist&limit={limit}"
+            "GET", f"/me/following?type=artist&limit={limit}{cursor}"
         )
 
     async def get_new_releases(
@@ -395,13 +546,14 @@ class SpotifyClient:
         )
 
     async def search(
-        self, query: str, limit: int = 20, offset: int = 0
+        self, query: str, limit: int = 10, offset: int = 0, types: tuple[str, ...] = SEARCH_TYPES
     ) -> dict[str, Any] | None:
+        """Search the given item types; ``limit`` and ``offset`` apply to each type."""
         encoded = urllib.parse.quote(query)
-        limit = max(1, min(limit, 10))
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
         return await self._api_request(
             "GET",
-            f"/search?q={encoded}&type=track,album,artist,playlist&limit={limit}&offset={offset}&market=from_token",
+            f"/search?q={encoded}&type={','.join(types)}&limit={limit}&offset={offset}&market=from_token",
         )
 
     async def get_user_profile(self) -> dict[str, Any] | None:
@@ -0,0 +1,342 @@
+"""Spotify playback command pipeline. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from ucapi import StatusCodes
+
+if TYPE_CHECKING:
+    from uc_intg_spotify.client import SpotifyClient
+    from uc_intg_spotify.device import SpotifyDevice
+
+_LOG = logging.getLogger(__name__)
+
+REPEAT_CYCLE = {"off": "context", "context": "track", "track": "off"}
+
+GROUP_TRANSPORT = "transport"
+GROUP_MODE = "mode"
+
+PREDICTION_GRACE = 3.0  # seconds a poll may still report the old track
+PREVIOUS_RESTART_THRESHOLD = 3  # seconds into a track before PREVIOUS restarts it
+TRACK_HISTORY_SIZE = 20
+
+Handler = Callable[["SpotifyClient", "dict[str, Any] | None"], Awaitable[bool]]
+
+
+class TrackPredictor:
+    """Predicts the track NEXT/PREVIOUS will land on so the UI can switch immediately.
+
+    NEXT takes the head of the device's upcoming queue; PREVIOUS restarts the current
+    track past ``PREVIOUS_RESTART_THRESHOLD`` seconds, otherwise goes back in the
+    local play history. The following polls reconcile the prediction: while Spotify
+    still reports the old track (within ``PREDICTION_GRACE``) the prediction is held,
+    any other track counts as a misprediction and replaces it.
+    """
+
+    def __init__(self) -> None:
+        self.history: deque[dict[str, Any]] = deque(maxlen=TRACK_HISTORY_SIZE)
+        self._expected_uri = ""
+        self._from_uri = ""
+        self._since = 0.0
+        self._rechecked = False
+        self.stats: dict[str, int] = {"predictions": 0, "hits": 0, "misses": 0}
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._expected_uri)
+
+    @property
+    def misprediction_rate(self) -> float:
+        settled = self.stats["hits"] + self.stats["misses"]
+        return self.stats["misses"] / settled if settled else 0.0
+
+    def predict_next(self, upcoming: list[dict[str, Any]], current_uri: str) -> dict[str, Any] | None:
+        # After an earlier prediction the current track may already be the queue head.
+        for index, track in enumerate(upcoming):
+            if track.get("uri") == current_uri:
+                return upcoming[index + 1] if index + 1 < len(upcoming) else None
+        return upcoming[0] if upcoming else None
+
+    def predict_previous(self, current: dict[str, Any], position: int) -> dict[str, Any] | None:
+        if current.get("uri") and position > PREVIOUS_RESTART_THRESHOLD:
+            return current
+        return self.history[-1] if self.history else None
+
+    def expect(self, expected_uri: str, from_uri: str) -> None:
+        # Repeated presses before a poll settles extend the pending prediction.
+        if not self._expected_uri:
+            self._from_uri = from_uri
+            self.stats["predictions"] += 1
+        self._expected_uri = expected_uri
+        self._since = time.monotonic()
+        self._rechecked = False
+
+    def claim_recheck(self) -> float | None:
+        """Delay until a held prediction can be settled by one more poll; None if that
+        poll was already scheduled in this grace window."""
+        if not self._expected_uri or self._rechecked:
+            return None
+        self._rechecked = True
+        return max(0.0, PREDICTION_GRACE - (time.monotonic() - self._since))
+
+    def drop(self) -> None:
+        """Forget a pending prediction without settling it (nothing is playing)."""
+        self._expected_uri = ""
+
+    def cancel(self) -> None:
+        if self._expected_uri:
+            self.stats["predictions"] -= 1
+        self._expected_uri = ""
+
+    def reconcile(self, uri: str) -> bool:
+        """Settle a pending prediction against a polled track. Returns True to keep
+        showing the predicted track because Spotify has not switched yet."""
+        if not self._expected_uri:
+            return False
+        if uri == self._expected_uri:
+            self.stats["hits"] += 1
+        elif uri == self._from_uri and time.monotonic() - self._since < PREDICTION_GRACE:
+            return True
+        else:
+            self.stats["misses"] += 1
+            _LOG.debug("Track prediction missed: expected %s, got %s", self._expected_uri, uri)
+        self._expected_uri = ""
+        return False
+
+
+class CommandExecutor:
+    """Runs playback commands for the media player and remote entities alike.
+
+    Commands are looked up by upper-case name, so media player command ids and remote
+    simple commands share one handler table. Conflicting commands (play, pause, seek,
+    next, previous) are serialized through one lock so they reach Spotify in the order
+    they were pressed. Handlers apply their optimistic state before the request and
+    roll it back if Spotify rejects it.
+    """
+
+    def __init__(self, device: SpotifyDevice) -> None:
+        self._device = device
+        self._locks = {GROUP_TRANSPORT: asyncio.Lock(), GROUP_MODE: asyncio.Lock()}
+        self._handlers: dict[str, tuple[Handler, str | None]] = {
+            "ON": (self._on, None),
+            "OFF": (self._pause, GROUP_TRANSPORT),
+            "PLAY_PAUSE": (self._play_pause, GROUP_TRANSPORT),
+            "PLAY": (self._play, GROUP_TRANSPORT),
+            "PAUSE": (self._pause, GROUP_TRANSPORT),
+            "NEXT": (self._next, GROUP_TRANSPORT),
+            "PREVIOUS": (self._previous, GROUP_TRANSPORT),
+            "SEEK": (self._seek, GROUP_TRANSPORT),
+            "VOLUME": (self._volume, None),
+            "VOLUME_UP": (self._volume_up, None),
+            "VOLUME_DOWN": (self._volume_down, None),
+            "MUTE_TOGGLE": (self._mute_toggle, None),
+            "MUTE": (self._mute, None),
+            "UNMUTE": (self._unmute, None),
+            "SHUFFLE": (self._shuffle, GROUP_MODE),
+            "REPEAT": (self._repeat, GROUP_MODE),
+        }
+        self.stats: dict[str, dict[str, float]] = {}
+
+    def supports(self, command: str) -> bool:
+        return _command_name(command) in self._handlers
+
+    async def execute(self, command: str, params: dict[str, Any] | None = None) -> StatusCodes:
+        name = _command_name(command)
+        entry = self._handlers.get(name)
+        if entry is None:
+            return StatusCodes.NOT_IMPLEMENTED
+        client = self._device.client
+        if not client or not client.is_authenticated():
+            return StatusCodes.SERVICE_UNAVAILABLE
+
+        handler, group = entry
+        started = time.monotonic()
+        ok = False
+        try:
+            if group:
+                async with self._locks[group]:
+                    ok = await handler(client, params)
+            else:
+                ok = await handler(client, params)
+        finally:
+            self._record(name, ok, (time.monotonic() - started) * 1000)
+        return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
+
+    def _record(self, command: str, ok: bool, elapsed_ms: float) -> None:
+        stats = self.stats.setdefault(
+            command, {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        )
+        stats["count"] += 1
+        if not ok:
+            stats["failures"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["last_ms"] = elapsed_ms
+        _LOG.debug("[%s] %s %s in %.0f ms", self._device.log_id, command, "ok" if ok else "failed", elapsed_ms)
+
+    # ── Transport ──
+
+    async def _on(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        return True
+
+    async def _set_playing(self, client: SpotifyClient, playing: bool, device_id: str | None = None) -> bool:
+        d = self._device
+        was_playing = d._is_playing
+        d.set_playing_state(playing)
+        ok = await (client.play(device_id) if playing else client.pause())
+        if ok:
+            d.schedule_playback_refresh()
+        else:
+            d.set_playing_state(was_playing)
+        return ok
+
+    async def _play_pause(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        if self._device._is_playing:
+            return await self._set_playing(client, False)
+        return await self._set_playing(client, True, self._device.get_first_available_device_id())
+
+    async def _play(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        device_id = None if self._device._is_playing else self._device.get_first_available_device_id()
+        return await self._set_playing(client, True, device_id)
+
+    async def _pause(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        return await self._set_playing(client, False)
+
+    async def _next(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        predicted = d.predictor.predict_next(d.upcoming_tracks, d._media_uri)
+        return await self._skip(client.next_track, predicted)
+
+    async def _previous(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        current = d.track_snapshot()
+        predicted = d.predictor.predict_previous(current, d._position)
+        if predicted is not None and predicted is not current:
+            d.predictor.history.pop()
+        ok = await self._skip(client.previous_track, predicted, record_history=False)
+        if not ok and predicted is not None and predicted is not current:
+            d.predictor.history.append(predicted)
+        return ok
+
+    async def _skip(
+        self, request: Callable[[], Awaitable[bool]], predicted: dict[str, Any] | None,
+        record_history: bool = True,
+    ) -> bool:
+        d = self._device
+        snapshot = d.track_snapshot()
+        if predicted:
+            d.predictor.expect(predicted.get("uri", ""), snapshot.get("uri", ""))
+            d.apply_track(predicted, predicted=True, record_history=record_history)
+
+        ok = await request()
+        if ok:
+            d.schedule_playback_refresh()
+        elif predicted:
+            d.predictor.cancel()
+            if record_history and d.predictor.history and d.predictor.history[-1].get("uri") == snapshot.get("uri"):
+                d.predictor.history.pop()
+            d.apply_track(snapshot, record_history=False)
+        return ok
+
+    async def _seek(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        position = int(params.get("media_position", 0)) if params else 0
+        previous = d._position
+        d._position = position
+        d.push_update()
+        ok = await client.seek(position * 1000)
+        if ok:
+            d.schedule_playback_refresh()
+        else:
+            d._position = previous
+            d.push_update()
+        return ok
+
+    # ── Volume (coalesced by the device's volume controller) ──
+
+    async def _volume(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        self._device.request_volume(int(params.get("volume", 50)) if params else 50)
+        return True
+
+    async def _volume_up(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        self._device.step_volume(1)
+        return True
+
+    async def _volume_down(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        self._device.step_volume(-1)
+        return True
+
+    async def _mute_toggle(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        d.request_volume(d.get_unmute_volume() if d._muted else 0)
+        return True
+
+    async def _mute(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        self._device.request_volume(0)
+        return True
+
+    async def _unmute(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        self._device.request_volume(self._device.get_unmute_volume())
+        return True
+
+    # ── Play modes ──
+
+    async def _shuffle(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        previous = (d._shuffle, d._smart_shuffle)
+        shuffle = parse_shuffle_param(params, d._shuffle)
+        d.set_shuffle_state(shuffle)
+        ok = await client.set_shuffle(shuffle)
+        if ok:
+            d.schedule_playback_refresh()
+        else:
+            d._shuffle, d._smart_shuffle = previous
+            d.push_update()
+        return ok
+
+    async def _repeat(self, client: SpotifyClient, params: dict[str, Any] | None) -> bool:
+        d = self._device
+        previous = d._repeat
+        repeat = parse_repeat_param(params, REPEAT_CYCLE.get(d._repeat, "off"))
+        d.set_repeat_state(repeat)
+        ok = await client.set_repeat(repeat)
+        if ok:
+            d.schedule_playback_refresh()
+        else:
+            d.set_repeat_state(previous)
+        return ok
+
+
+def _command_name(command: str) -> str:
+    return str(getattr(command, "value", command)).upper()
+
+
+def parse_shuffle_param(params: dict[str, Any] | None, current: bool) -> bool:
+    if not params or "shuffle" not in params:
+        return not current
+    value = params["shuffle"]
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def parse_repeat_param(params: dict[str, Any] | None, default: str) -> str:
+    if params:
+        value = params.get("repeat")
+        if value is not None:
+            mapping = {
+                "off": "off",
+                "none": "off",
+                "all": "context",
+                "context": "context",
+                "one": "track",
+                "track": "track",
+            }
+            mapped = mapping.get(str(getattr(value, "value", value)).lower())
+            if mapped:
+                return mapped
+    return default
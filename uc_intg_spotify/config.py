@@ -15,6 +15,8 @@ class SpotifyDeviceConfig:
     token_expires_at: int = 0
     polling_interval: int = 10
     user_id: str = ""
+    browse_prefetch: bool = False
+    browse_prefetch_budget: int = 6
 
 
 def account_suffix(config: SpotifyDeviceConfig) -> str:
@@ -4,59 +4,107 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
-import re
+import os
 import time
-from typing import Any
+from typing import TYPE_CHECKING, Any, Awaitable
 
 from ucapi import DeviceStates
 from ucapi_framework import DeviceEvents, PollingDevice
 
 from uc_intg_spotify.client import SpotifyAuthError, SpotifyClient
+from uc_intg_spotify.commands import CommandExecutor, TrackPredictor
 from uc_intg_spotify.config import SpotifyDeviceConfig
 from uc_intg_spotify.discovery import (
     SpotifyDiscovery,
     activate_connect_device,
+    get_device_info,
     resolve_device_names,
-    _is_junk_name,
 )
+from uc_intg_spotify.playqueue import PlaybackQueue
+from uc_intg_spotify.registry import ActivationWaiter, DeviceRegistry, device_display_name
 
-_LOG = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from uc_intg_spotify.artcache import ArtworkCache
+    from uc_intg_spotify.library import LibraryIndex
+    from uc_intg_spotify.searchsession import SearchSession
+    from uc_intg_spotify.thumbnails import RootThumbnails
+    from uc_intg_spotify.scheduler import PollScheduler
 
-_HEX_HASH_RE = re.compile(r"^[0-9a-f]{32,}$", re.IGNORECASE)
+_LOG = logging.getLogger(__name__)
 
-DEVICE_CACHE_TTL = 86400  # 24 hours
+ARTWORK_PREFETCH_TRACKS = 3  # upcoming covers warmed in the artwork cache
 PLAYBACK_REFRESH_DELAY = 0.5
-ACTIVATION_POLL_ATTEMPTS = 20
-ACTIVATION_POLL_INTERVAL = 1.0
-
-_DEVICE_TYPE_LABELS = {
-    "Computer": "Computer",
-    "Smartphone": "Phone",
-    "Tablet": "Tablet",
-    "Speaker": "Speaker",
-    "TV": "TV",
-    "AVR": "Receiver",
-    "STB": "Set-Top Box",
-    "AudioDongle": "Audio Dongle",
-    "GameConsole": "Game Console",
-    "CastVideo": "Chromecast",
-    "CastAudio": "Cast Audio",
-    "Automobile": "Car",
-}
-
-
-def device_display_name(dev: dict[str, Any]) -> str:
-    """Build a user-friendly display name for a Spotify Connect device."""
-    override = dev.get("_display_name", "")
-    if override:
-        return override
-    name = dev.get("name", "")
-    if name and not _HEX_HASH_RE.match(name):
-        return name
-    dev_type = dev.get("type", "Device")
-    label = _DEVICE_TYPE_LABELS.get(dev_type, dev_type)
-    dev_id = dev.get("id", "")
-    return f"{label} ({dev_id[:6]})" if dev_id else label
+TOKEN_WARMUP_MARGIN = 300  # seconds; connecting refreshes tokens expiring this soon
+WARMUP_TIMEOUT = 5.0  # seconds connecting waits for warm-up; unfinished phases continue
+POLL_REQUEST_COST = 2  # playback state + device list
+VOLUME_DEBOUNCE = 0.25
+VOLUME_MAX_DELAY = 0.75
+
+
+class VolumeController:
+    """Coalesces bursts of volume changes into a single trailing request.
+
+    Changes are applied to local state immediately. The request is sent once the
+    burst has been quiet for ``VOLUME_DEBOUNCE`` (or ``VOLUME_MAX_DELAY`` after the
+    first change while a button is held) with the latest target; a request that is
+    still in flight when a newer target goes out is cancelled.
+    """
+
+    def __init__(self, device: SpotifyDevice) -> None:
+        self._device = device
+        self._target: int | None = None
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._flush_task: asyncio.Task[None] | None = None
+        self._send_task: asyncio.Task[None] | None = None
+
+    @property
+    def busy(self) -> bool:
+        """True while a change is pending or in flight, so polls must not overwrite it."""
+        return any(task is not None and not task.done() for task in (self._flush_task, self._send_task))
+
+    def set(self, volume: int) -> None:
+        volume = max(0, min(100, volume))
+        self._device.set_volume_state(volume)
+        self._target = volume
+        now = time.monotonic()
+        self._last_change = now
+        if self._flush_task is None or self._flush_task.done():
+            self._first_change = now
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def step(self, delta: int) -> None:
+        self.set(self._device._volume + delta)
+
+    async def cancel(self) -> None:
+        for task in (self._flush_task, self._send_task):
+            if task and not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._flush_task = None
+        self._send_task = None
+
+    async def _flush_later(self) -> None:
+        while True:
+            due = min(self._last_change + VOLUME_DEBOUNCE, self._first_change + VOLUME_MAX_DELAY)
+            wait = due - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+
+        if self._send_task and not self._send_task.done():
+            self._send_task.cancel()
+        self._send_task = asyncio.create_task(self._send(self._target))
+
+    async def _send(self, volume: int | None) -> None:
+        client = self._device.client
+        if client is None or volume is None:
+            return
+        ok = await client.set_volume(volume)
+        if not ok and volume == self._target:
+            _LOG.debug("[%s] Volume change to %d failed, resyncing", self._device.log_id, volume)
+            self._device.schedule_playback_refresh()
 
 
 class SpotifyDevice(PollingDevice):
@@ -89,14 +137,25 @@ class SpotifyDevice(PollingDevice):
 
         self._source_name: str = ""
         self._source_list: list[str] = []
-        self._devices: list[dict[str, Any]] = []
         self._disallows: dict[str, bool] = {}
 
-        self._device_cache: dict[str, dict[str, Any]] = {}
+        self._registry = DeviceRegistry()
+        self._activation = ActivationWaiter()
         self._discovery = SpotifyDiscovery(on_update=self._on_zeroconf_update)
         self._playback_refresh_task: asyncio.Task[None] | None = None
         self._login_id: str = device_config.user_id or ""
-        self._resolved_names: dict[str, str] = {}
+        self._volume_ctl = VolumeController(self)
+        self._commands = CommandExecutor(self)
+        self._predictor = TrackPredictor()
+        self._track_predicted: bool = False
+        self._queue = PlaybackQueue(on_change=self._prefetch_artwork)
+        self._artwork_task: asyncio.Task[None] | None = None
+        self._root_thumbnails: RootThumbnails | None = None
+        self._library: LibraryIndex | None = None
+        self._search_session: SearchSession | None = None
+        self._warmup_tasks: set[asyncio.Task[None]] = set()
+        self._warmed_devices: list[dict[str, Any]] | None = None  # handed to the first poll
+        self.warm_up_timings: dict[str, float] = {}
 
     @property
     def identifier(self) -> str:
@@ -118,29 +177,102 @@ class SpotifyDevice(PollingDevice):
     def client(self) -> SpotifyClient | None:
         return self._client
 
+    @property
+    def commands(self) -> CommandExecutor:
+        return self._commands
+
+    @property
+    def command_stats(self) -> dict[str, dict[str, float]]:
+        """Per-command latency statistics (ms) for commands from any entity."""
+        return self._commands.stats
+
+    @property
+    def predictor(self) -> TrackPredictor:
+        return self._predictor
+
+    @property
+    def queue(self) -> PlaybackQueue:
+        return self._queue
+
+    @property
+    def root_thumbnails(self) -> RootThumbnails:
+        if self._root_thumbnails is None:
+            from uc_intg_spotify.thumbnails import RootThumbnails
+
+            self._root_thumbnails = RootThumbnails(self._data_file(f"root_thumbnails_{self.identifier}.json"))
+        return self._root_thumbnails
+
+    def _data_file(self, filename: str) -> str | None:
+        """Path of a per-account cache file in the integration config directory."""
+        config_manager = getattr(self._driver, "config_manager", None)
+        data_path = getattr(config_manager, "data_path", None)
+        return os.path.join(data_path, filename) if data_path else None
+
+    @property
+    def library(self) -> LibraryIndex:
+        if self._library is None:
+            # Library, SQLite store and search modules load on first use, not at startup.
+            from uc_intg_spotify.library import LibraryIndex
+            from uc_intg_spotify.librarystore import LibraryStore
+
+            path = self._data_file(f"library_{self.identifier}.sqlite3")
+            self._library = LibraryIndex(LibraryStore(path) if path else None)
+        return self._library
+
+    @property
+    def search_session(self) -> SearchSession:
+        if self._search_session is None:
+            from uc_intg_spotify.searchsession import SearchSession
+
+            self._search_session = SearchSession()
+        return self._search_session
+
+    @property
+    def browse_prefetch_budget(self) -> int:
+        """API requests browse may spend warming likely-next pages; 0 when disabled."""
+        cfg = self._device_config
+        return cfg.browse_prefetch_budget if cfg.browse_prefetch else 0
+
+    @property
+    def upcoming_tracks(self) -> list[dict[str, Any]]:
+        """Track snapshots expected to play after the current one, soonest first."""
+        return self._queue.upcoming
+
+    def _prefetch_artwork(self, upcoming: list[dict[str, Any]]) -> None:
+        """Cache the next covers so the now playing image swaps without a blank."""
+        artwork = getattr(self._driver, "artwork", None)
+        if artwork is None or not artwork.running:
+            return
+        urls = [item["image_url"] for item in upcoming[:ARTWORK_PREFETCH_TRACKS] if item.get("image_url")]
+        if not urls:
+            return
+        if self._artwork_task and not self._artwork_task.done():
+            self._artwork_task.cancel()
+        self._artwork_task = asyncio.create_task(self._warm_artwork(artwork, urls))
+
+    async def _warm_artwork(self, artwork: ArtworkCache, urls: list[str]) -> None:
+        cached = await artwork.prefetch(urls)
+        _LOG.debug("[%s] Prefetched %d/%d upcoming covers", self.log_id, cached, len(urls))
+
+    @property
+    def prediction_stats(self) -> dict[str, float]:
+        """Optimistic NEXT/PREVIOUS prediction counts and misprediction rate."""
+        return {**self._predictor.stats, "misprediction_rate": self._predictor.misprediction_rate}
+
+    @property
+    def _scheduler(self) -> PollScheduler | None:
+        return getattr(self._driver, "poll_scheduler", None)
+
+    @property
+    def activation_metrics(self) -> dict[str, dict[str, Any]]:
+        """Per-device time-to-ready statistics for LAN activations."""
+        return self._activation.metrics
+
     def get_device_id_by_name(self, name: str) -> str | None:
-        for dev in self._devices:
-            if device_display_name(dev) == name:
-                return dev.get("id", "")
-        for cached in self._device_cache.values():
-            dev = cached["device"]
-            if device_display_name(dev) == name:
-                return dev.get("id", "")
-        for zc_dev in self._discovery.devices.values():
-            if zc_dev.get("name") == name:
-                return zc_dev.get("device_id", "")
-        return None
+        return self._registry.device_id_by_name(name)
 
     def get_first_available_device_id(self) -> str | None:
-        if self._devices:
-            return self._devices[0].get("id")
-        return None
-
-    def _find_zeroconf_device_by_name(self, name: str) -> dict[str, Any] | None:
-        for zc_dev in self._discovery.devices.values():
-            if zc_dev.get("name") == name and zc_dev.get("ip") and zc_dev.get("port"):
-                return zc_dev
-        return None
+        return self._registry.first_api_device_id()
 
     async def _ensure_login_id(self) -> str:
         if self._login_id:
@@ -159,10 +291,10 @@ class SpotifyDevice(PollingDevice):
             return False
 
         device_id = self.get_device_id_by_name(name)
-        if device_id and any(d.get("id") == device_id for d in self._devices):
+        if device_id and self._registry.is_api_device(device_id):
             return await self._client.transfer_playback(device_id)
 
-        zc_dev = self._find_zeroconf_device_by_name(name)
+        zc_dev = self._registry.zeroconf_device_by_name(name)
         if zc_dev:
             activated = await self._activate_device(zc_dev)
             if activated:
@@ -175,38 +307,64 @@ class SpotifyDevice(PollingDevice):
         return False
 
     async def _activate_device(self, zc_dev: dict[str, Any]) -> bool:
+        info = await get_device_info(self._discovery, zc_dev)
+        if not info or info.get("tokenType") != "accesstoken":
+            _LOG.info("[%s] Connect device '%s' cannot be activated with an access token",
+                      self.log_id, zc_dev.get("name"))
+            return False
+
         login_id = await self._ensure_login_id()
         await self._client.ensure_fresh_token()
 
         device_id = await activate_connect_device(
             zc_dev["ip"], zc_dev["port"], zc_dev.get("cpath", "/zc"),
-            self._client.access_token, login_id,
+            self._client.access_token, login_id, info=info,
         )
         if device_id is None:
             _LOG.info("[%s] Could not activate Connect device '%s'", self.log_id, zc_dev.get("name"))
             return False
 
         target = device_id or zc_dev.get("device_id", "")
-        for _ in range(ACTIVATION_POLL_ATTEMPTS):
-            await asyncio.sleep(ACTIVATION_POLL_INTERVAL)
-            devices = await self._client.get_available_devices()
-            self._devices = devices
-            match = None
-            if target:
-                match = next((d for d in devices if d.get("id") == target), None)
-            if not match:
-                match = next((d for d in devices if device_display_name(d) == zc_dev.get("name")), None)
-            if match and match.get("id"):
-                return await self._client.transfer_playback(match["id"])
+        match_id = await self._activation.wait(
+            self._registry, target, zc_dev.get("name", ""), self._refresh_devices
+        )
+        if match_id:
+            return await self._client.transfer_playback(match_id)
 
         _LOG.info("[%s] Device '%s' did not register after activation", self.log_id, zc_dev.get("name"))
         return False
 
     def get_device_volume(self, device_id: str) -> int | None:
-        for dev in self._devices:
-            if dev.get("id") == device_id and dev.get("supports_volume"):
-                return dev.get("volume_percent")
-        return None
+        return self._registry.device_volume(device_id)
+
+    def track_snapshot(self) -> dict[str, Any]:
+        return {
+            "uri": self._media_uri,
+            "title": self._title,
+            "artist": self._artist,
+            "album": self._album,
+            "image_url": self._image_url,
+            "duration": self._duration,
+        }
+
+    def apply_track(
+        self, track: dict[str, Any], predicted: bool = False, record_history: bool = True
+    ) -> None:
+        """Show a track as current. Predicted tracks start at position 0 and are
+        confirmed or replaced by the next poll."""
+        uri = track.get("uri", "")
+        if record_history and uri != self._media_uri and self._title and not self._track_predicted:
+            self._predictor.history.append(self.track_snapshot())
+        self._media_uri = uri
+        self._title = track.get("title", "")
+        self._artist = track.get("artist", "")
+        self._album = track.get("album", "")
+        self._image_url = track.get("image_url", "")
+        self._duration = track.get("duration", 0)
+        self._track_predicted = predicted
+        if predicted:
+            self._position = 0
+        self.push_update()
 
     def set_playing_state(self, is_playing: bool) -> None:
         self._is_playing = is_playing
@@ -223,6 +381,13 @@ class SpotifyDevice(PollingDevice):
             self._last_nonzero_volume = self._volume
         self.push_update()
 
+    def request_volume(self, volume: int) -> None:
+        """Apply a volume change locally and send it coalesced with any burst in progress."""
+        self._volume_ctl.set(volume)
+
+    def step_volume(self, delta: int) -> None:
+        self._volume_ctl.step(delta)
+
     def get_unmute_volume(self) -> int:
         return max(1, min(100, self._last_nonzero_volume or 50))
 
@@ -241,9 +406,9 @@ class SpotifyDevice(PollingDevice):
             self._playback_refresh_task.cancel()
         self._playback_refresh_task = asyncio.create_task(self._refresh_playback_after_delay())
 
-    async def _refresh_playback_after_delay(self) -> None:
+    async def _refresh_playback_after_delay(self, delay: float = PLAYBACK_REFRESH_DELAY) -> None:
         try:
-            await asyncio.sleep(PLAYBACK_REFRESH_DELAY)
+            await asyncio.sleep(delay)
             await self.poll_device()
         except asyncio.CancelledError:
             raise
@@ -251,49 +416,122 @@ class SpotifyDevice(PollingDevice):
             _LOG.debug("[%s] Playback refresh failed: %s", self.log_id, err)
 
     async def establish_connection(self) -> None:
+        """Connect the account and do the cold work of its first poll and browse.
+
+        Runs before the poll loop starts and entities register, so nothing races it.
+        Per-phase durations in ms land in :attr:`warm_up_timings`: ``preconnect`` (TLS
+        to the Web API), ``token`` (refresh if close to expiry), then ``devices``
+        (Connect device list) and ``root`` (root menu thumbnails) concurrently.
+        """
         cfg = self._device_config
         self._client = SpotifyClient(cfg.access_token, cfg.refresh_token)
         self._client.set_credentials(cfg.client_id, cfg.client_secret)
         self._client.set_token_refresh_callback(self._persist_tokens)
-
-        if not cfg.access_token or self._is_token_expired():
+        if self._scheduler:
+            self._client.set_api_budget(self._scheduler.budget(cfg.client_id))
+            self._scheduler.register(self.identifier)
+        self.warm_up_timings = {}
+        self._warmed_devices = None
+        deadline = time.monotonic() + WARMUP_TIMEOUT
+
+        await self._timed("preconnect", self._client.preconnect())
+        if not cfg.access_token or int(time.time()) + TOKEN_WARMUP_MARGIN >= cfg.token_expires_at:
+            started = time.monotonic()
             try:
                 token_data = await self._client.refresh_access_token()
             except SpotifyAuthError:
                 await self._handle_auth_failure()
                 raise ConnectionError("Spotify re-authentication required")
-            if not token_data:
+            self.warm_up_timings["token"] = round((time.monotonic() - started) * 1000, 1)
+            if token_data:
+                self._persist_tokens(token_data)
+            elif not cfg.access_token or self._is_token_expired():
                 raise ConnectionError("Failed to refresh Spotify access token")
-            self._persist_tokens(token_data)
 
         self._discovery.start()
+        self.library.schedule_sync(self._client)
+        await self._warm_up(max(0.0, deadline - time.monotonic()))
         self._state = "ON"
-        _LOG.info("[%s] Connected to Spotify", self.log_id)
+        _LOG.info("[%s] Connected to Spotify, warm-up (ms): %s", self.log_id, self.warm_up_timings)
+
+    async def _warm_up(self, timeout: float) -> None:
+        async def devices() -> None:
+            found = await self._client.get_available_devices()
+            self._update_devices(found)
+            if self._poll_task is None:  # a late list would be older than the poll's own
+                self._warmed_devices = found
+
+        async def root() -> None:
+            if self.root_thumbnails.stale:
+                await self.root_thumbnails.refresh(self._client)
+
+        tasks = {
+            asyncio.create_task(self._timed("devices", devices())),
+            asyncio.create_task(self._timed("root", root())),
+        }
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            _LOG.info("[%s] Warm-up exceeded %.1fs, finishing in the background", self.log_id, WARMUP_TIMEOUT)
+        for task in pending:
+            self._warmup_tasks.add(task)
+            task.add_done_callback(self._warmup_tasks.discard)
+
+    async def _timed(self, phase: str, coro: Awaitable[Any]) -> None:
+        started = time.monotonic()
+        try:
+            await coro
+        except Exception as err:
+            _LOG.debug("[%s] Warm-up phase %s failed: %s", self.log_id, phase, err)
+        self.warm_up_timings[phase] = round((time.monotonic() - started) * 1000, 1)
+
+    async def _poll_loop(self) -> None:
+        """Poll on the driver's staggered schedule, deferring to user commands when the
+        shared client_id budget runs low."""
+        scheduler = self._scheduler
+        if scheduler is None:
+            await super()._poll_loop()
+            return
+
+        budget = scheduler.budget(self._device_config.client_id)
+        delay = scheduler.phase_delay(self.identifier, self._poll_interval)
+        while not self._stop_polling.is_set():
+            if delay:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stop_polling.wait(), timeout=delay)
+                if self._stop_polling.is_set():
+                    break
+            await budget.wait_for_headroom(POLL_REQUEST_COST)
+            try:
+                await self.poll_device()
+            except asyncio.CancelledError:
+                break
+            except Exception as err:
+                _LOG.error("[%s] Poll error: %s", self.log_id, err)
+            delay = scheduler.next_delay(self._poll_interval)
 
     async def poll_device(self) -> None:
         if not self._client:
             return
 
+        recheck = False
         try:
             playback = await self._client.get_playback_state()
-            devices = await self._client.get_available_devices()
+            devices, self._warmed_devices = self._warmed_devices, None
+            if devices is None:
+                devices = await self._client.get_available_devices()
 
             if playback and playback.get("title"):
                 self._is_playing = playback.get("is_playing", False)
-                self._title = playback.get("title", "")
-                self._artist = ", ".join(playback.get("artists", []))
-                self._album = playback.get("album", "")
-                self._image_url = playback.get("image_url", "")
-                self._duration = playback.get("duration_ms", 0) // 1000
-                self._position = playback.get("progress_ms", 0) // 1000
-                self._volume = playback.get("volume_percent", 0)
-                self._muted = self._volume == 0
-                if self._volume > 0:
-                    self._last_nonzero_volume = self._volume
+                if self._predictor.reconcile(playback.get("uri", "")):
+                    recheck = True
+                else:
+                    self._apply_polled_track(playback)
+                    ctx = playback.get("context") or {}
+                    self._queue.track(self._client, self._media_uri, ctx.get("uri", ""))
+                self._apply_polled_volume(playback.get("volume_percent", 0))
                 self._smart_shuffle = playback.get("smart_shuffle", False)
                 self._shuffle = playback.get("shuffle_state", False) or self._smart_shuffle
                 self._repeat = playback.get("repeat_state", "off")
-                self._media_uri = playback.get("uri", "")
                 self._media_type = playback.get("currently_playing_type", "track")
                 self._disallows = playback.get("disallows", {})
                 self._state = "PLAYING" if self._is_playing else "PAUSED"
@@ -305,14 +543,9 @@ class SpotifyDevice(PollingDevice):
                 else:
                     self._context_uri = ""
                     self._context_type = ""
-
-                active_id = playback.get("device_id", "")
-                active_dev = next((d for d in devices if d.get("id") == active_id), None)
-                if active_dev:
-                    self._source_name = device_display_name(active_dev)
-                else:
-                    self._source_name = playback.get("device_name", "")
             elif playback:
+                self._predictor.drop()
+                self._track_predicted = False
                 self._state = "ON"
                 self._is_playing = False
                 self._title = ""
@@ -322,15 +555,14 @@ class SpotifyDevice(PollingDevice):
                 self._duration = 0
                 self._position = 0
                 self._media_uri = ""
-                self._volume = playback.get("volume_percent", 0)
-                self._muted = self._volume == 0
-                if self._volume > 0:
-                    self._last_nonzero_volume = self._volume
+                self._apply_polled_volume(playback.get("volume_percent", 0))
                 self._smart_shuffle = playback.get("smart_shuffle", False)
                 self._shuffle = playback.get("shuffle_state", False) or self._smart_shuffle
                 self._repeat = playback.get("repeat_state", "off")
                 self._disallows = playback.get("disallows", {})
             else:
+                self._predictor.drop()
+                self._track_predicted = False
                 self._state = "ON"
                 self._is_playing = False
                 self._title = ""
@@ -342,11 +574,15 @@ class SpotifyDevice(PollingDevice):
                 self._media_uri = ""
                 self._disallows = {}
 
-            self._devices = devices
-            self._update_device_cache(devices)
             await resolve_device_names(self._discovery)
-            self._enrich_api_device_names()
-            self._source_list = self._build_source_list(devices)
+            self._update_devices(devices)
+
+            if playback and playback.get("title"):
+                active_dev = self._registry.api_device(playback.get("device_id", ""))
+                if active_dev:
+                    self._source_name = device_display_name(active_dev)
+                else:
+                    self._source_name = playback.get("device_name", "")
 
             self.push_update()
 
@@ -357,6 +593,42 @@ class SpotifyDevice(PollingDevice):
             if self._state != "UNAVAILABLE":
                 self._state = "UNAVAILABLE"
                 self.events.emit(DeviceEvents.DISCONNECTED, self.identifier)
+        if recheck:
+            self._schedule_prediction_recheck()
+
+    def _schedule_prediction_recheck(self) -> None:
+        """Poll once more when a held prediction's grace window ends. Runs after the
+        poll finished and never cancels a refresh task, which may be the caller."""
+        task = self._playback_refresh_task
+        if task and not task.done() and task is not asyncio.current_task():
+            return  # a refresh is already pending and will reconcile the prediction
+        delay = self._predictor.claim_recheck()
+        if delay is None:
+            return
+        self._playback_refresh_task = asyncio.create_task(
+            self._refresh_playback_after_delay(max(delay, PLAYBACK_REFRESH_DELAY))
+        )
+
+    def _apply_polled_track(self, playback: dict[str, Any]) -> None:
+        uri = playback.get("uri", "")
+        if uri != self._media_uri and self._title and not self._track_predicted:
+            self._predictor.history.append(self.track_snapshot())
+        self._track_predicted = False
+        self._media_uri = uri
+        self._title = playback.get("title", "")
+        self._artist = ", ".join(playback.get("artists", []))
+        self._album = playback.get("album", "")
+        self._image_url = playback.get("image_url", "")
+        self._duration = playback.get("duration_ms", 0) // 1000
+        self._position = playback.get("progress_ms", 0) // 1000
+
+    def _apply_polled_volume(self, volume: int) -> None:
+        if self._volume_ctl.busy:
+            return
+        self._volume = volume
+        self._muted = self._volume == 0
+        if self._volume > 0:
+            self._last_nonzero_volume = self._volume
 
     async def _handle_auth_failure(self) -> None:
         """Discard the expired refresh token and flag that re-authentication is required."""
@@ -382,76 +654,49 @@ class SpotifyDevice(PollingDevice):
             with contextlib.suppress(asyncio.CancelledError):
                 await self._playback_refresh_task
             self._playback_refresh_task = None
+        await self._volume_ctl.cancel()
+        for task in list(self._warmup_tasks):
+            task.cancel()
+        await self._queue.cancel()
+        if self._artwork_task:
+            self._artwork_task.cancel()
+            self._artwork_task = None
+        if self._library:
+            await self._library.cancel()
+        if self._search_session:
+            self._search_session.clear()
+        if self._root_thumbnails:
+            await self._root_thumbnails.cancel()
         self._discovery.stop()
+        if self._scheduler:
+            self._scheduler.unregister(self.identifier)
         if self._client:
             await self._client.close()
             self._client = None
         self._state = "UNAVAILABLE"
         await super().disconnect()
 
-    def _update_device_cache(self, api_devices: list[dict[str, Any]]) -> None:
-        now = time.time()
-        for dev in api_devices:
-            dev_id = dev.get("id", "")
-            if dev_id:
-                self._device_cache[dev_id] = {
-                    "device": dev,
-                    "last_seen": now,
-                }
-
-        expired = [k for k, v in self._device_cache.items() if now - v["last_seen"] > DEVICE_CACHE_TTL]
-        for k in expired:
-            del self._device_cache[k]
-
-    def _build_source_list(self, api_devices: list[dict[str, Any]]) -> list[str]:
-        seen_names: set[str] = set()
-        result: list[str] = []
-
-        for dev in api_devices:
-            if dev.get("id"):
-                name = device_display_name(dev)
-                if name not in seen_names:
-                    seen_names.add(name)
-                    result.append(name)
-
-        zeroconf_devices = self._discovery.devices
-        for zc_dev in zeroconf_devices.values():
-            name = zc_dev.get("name", "")
-            if name and not _is_junk_name(name) and name not in seen_names:
-                seen_names.add(name)
-                result.append(name)
-
-        for cached in self._device_cache.values():
-            dev = cached["device"]
-            name = device_display_name(dev)
-            if name not in seen_names:
-                seen_names.add(name)
-                result.append(name)
-
-        return result
-
-    def _enrich_api_device_names(self) -> None:
-        """Use Zeroconf-resolved names to fix API devices with hex hash names.
-
-        Resolved names are cached by device id so enrichment survives transient
-        Zeroconf gaps (devices that only answer mDNS queries intermittently)."""
-        for zc_dev in self._discovery.devices.values():
-            device_id = zc_dev.get("device_id", "")
-            name = zc_dev.get("name", "")
-            if device_id and name and not _is_junk_name(name):
-                self._resolved_names[device_id] = name
-
-        for dev in self._devices:
-            api_name = dev.get("name", "")
-            api_id = dev.get("id", "")
-            if api_id and api_name and _HEX_HASH_RE.match(api_name):
-                resolved_name = self._resolved_names.get(api_id, "")
-                if resolved_name:
-                    dev["_display_name"] = resolved_name
+    async def _refresh_devices(self) -> None:
+        if self._client:
+            self._update_devices(await self._client.get_available_devices())
+
+    def _update_devices(self, devices: list[dict[str, Any]]) -> None:
+        self._registry.set_api_devices(devices)
+        self._registry.set_zeroconf_devices(self._discovery.devices)
+        self._registry.refresh()
+        self._source_list = self._registry.source_list
+        self._activation.notify(self._registry)
 
     def _on_zeroconf_update(self) -> None:
-        if self._state != "UNAVAILABLE":
-            self._source_list = self._build_source_list(self._devices)
+        # Zeroconf callbacks fire on the zeroconf thread; the registry is loop-owned.
+        self._loop.call_soon_threadsafe(self._apply_zeroconf_update)
+
+    def _apply_zeroconf_update(self) -> None:
+        if self._state == "UNAVAILABLE":
+            return
+        self._registry.set_zeroconf_devices(self._discovery.devices)
+        if self._registry.refresh():
+            self._source_list = self._registry.source_list
             self.push_update()
 
     def _is_token_expired(self) -> bool:
@@ -4,15 +4,19 @@ from __future__ import annotations
 import logging
 import re
 import threading
-from typing import Any, Callable
+import time
+from typing import TYPE_CHECKING, Any, Callable
 
 import aiohttp
 
-from zeroconf import ServiceBrowser, ServiceStateChange, Zeroconf
+if TYPE_CHECKING:
+    from zeroconf import ServiceBrowser, ServiceStateChange, Zeroconf
 
 _LOG = logging.getLogger(__name__)
 
 SPOTIFY_CONNECT_SERVICE = "_spotify-connect._tcp.local."
+ZEROCONF_VERSION = "2.7.1"
+DEVICE_INFO_TTL = 600  # 10 minutes
 
 _HEX_HASH_RE = re.compile(r"^[0-9a-f]{12,}$", re.IGNORECASE)
 _UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-", re.IGNORECASE)
@@ -37,6 +41,7 @@ class SpotifyDiscovery:
         self._zeroconf: Zeroconf | None = None
         self._browser: ServiceBrowser | None = None
         self._devices: dict[str, dict[str, Any]] = {}
+        self._info: dict[str, tuple[float, dict[str, Any]]] = {}
         self._lock = threading.Lock()
         self._on_update = on_update
 
@@ -45,10 +50,26 @@ class SpotifyDiscovery:
         with self._lock:
             return dict(self._devices)
 
+    def get_info(self, service_name: str) -> dict[str, Any] | None:
+        """Return the cached getInfo response for a service if it is still fresh."""
+        with self._lock:
+            cached = self._info.get(service_name)
+        if cached and time.monotonic() - cached[0] < DEVICE_INFO_TTL:
+            return cached[1]
+        return None
+
+    def store_info(self, service_name: str, info: dict[str, Any]) -> None:
+        with self._lock:
+            if service_name in self._devices:
+                self._info[service_name] = (time.monotonic(), info)
+
     def start(self) -> None:
         if self._zeroconf:
             return
         try:
+            # The zeroconf stack is the heaviest import here; load it only when needed.
+            from zeroconf import ServiceBrowser, Zeroconf
+
             self._zeroconf = Zeroconf()
             self._browser = ServiceBrowser(
                 self._zeroconf,
@@ -70,11 +91,14 @@ class SpotifyDiscovery:
             self._zeroconf = None
         with self._lock:
             self._devices.clear()
+            self._info.clear()
         _LOG.info("Spotify Connect Zeroconf discovery stopped")
 
     def _on_state_change(
         self, zeroconf: Zeroconf, service_type: str, name: str, state_change: ServiceStateChange
     ) -> None:
+        from zeroconf import ServiceStateChange
+
         if state_change in (ServiceStateChange.Added, ServiceStateChange.Updated):
             self._handle_service_found(zeroconf, service_type, name)
         elif state_change == ServiceStateChange.Removed:
@@ -102,6 +126,7 @@ class SpotifyDiscovery:
                 return
 
             with self._lock:
+                self._info.pop(name, None)
                 self._devices[name] = {
                     "name": "",
                     "ip": ip,
@@ -126,6 +151,7 @@ class SpotifyDiscovery:
     def _handle_service_removed(self, name: str) -> None:
         with self._lock:
             removed = self._devices.pop(name, None)
+            self._info.pop(name, None)
         if removed:
             _LOG.debug("Zeroconf: device removed '%s' (%s)", removed.get("name"), name)
             if self._on_update:
@@ -146,10 +172,11 @@ async def resolve_device_names(discovery: SpotifyDiscovery) -> None:
         if not ip or not port:
             continue
 
-        result = await _query_device_info(ip, port, cpath)
-        if result:
-            friendly_name = result.get("name", "")
-            device_id = result.get("device_id", "")
+        info = await _query_device_info(ip, port, cpath)
+        if info:
+            discovery.store_info(service_name, info)
+            friendly_name = _info_friendly_name(info)
+            device_id = _info_device_id(info)
             with discovery._lock:
                 if service_name in discovery._devices:
                     if friendly_name and not _is_junk_name(friendly_name):
@@ -164,39 +191,53 @@ async def resolve_device_names(discovery: SpotifyDiscovery) -> None:
             _LOG.debug("Zeroconf: could not resolve info for %s", service_name)
 
 
+async def get_device_info(discovery: SpotifyDiscovery, zc_dev: dict[str, Any]) -> dict[str, Any] | None:
+    """Return the getInfo response for a discovered device, from cache when fresh."""
+    service_name = zc_dev.get("service_name", "")
+    info = discovery.get_info(service_name)
+    if info is None:
+        info = await _query_device_info(zc_dev["ip"], zc_dev["port"], zc_dev.get("cpath", "/zc"))
+        if info:
+            discovery.store_info(service_name, info)
+    return info
+
+
 async def activate_connect_device(
-    ip: str, port: int, cpath: str, access_token: str, login_id: str
+    ip: str, port: int, cpath: str, access_token: str, login_id: str,
+    info: dict[str, Any] | None = None,
 ) -> str | None:
     """Activate an inactive Spotify Connect device over the LAN so it registers with
     Spotify and becomes a valid Web API playback target.
 
     Uses the Zeroconf ``addUser`` action with the user's OAuth access token (devices
-    reporting ``tokenType=accesstoken``). Returns the device id on success, else None.
+    reporting ``tokenType=accesstoken``). Pass a cached getInfo response as ``info`` to
+    skip the getInfo round trip; devices that cannot be activated are then rejected
+    without any network I/O. Returns the device id on success, else None.
     """
     base = f"http://{ip}:{port}{cpath}"
+    if info is None:
+        info = await _query_device_info(ip, port, cpath)
+        if info is None:
+            return None
+
+    device_id = _info_device_id(info)
+    if info.get("tokenType") != "accesstoken":
+        _LOG.debug("Zeroconf: device %s tokenType=%r not activatable via access token",
+                   device_id, info.get("tokenType"))
+        return None
+
     timeout = aiohttp.ClientTimeout(total=6)
     try:
+        data = {
+            "action": "addUser",
+            "version": ZEROCONF_VERSION,
+            "tokenType": "accesstoken",
+            "clientKey": "",
+            "loginId": login_id or "",
+            "userName": login_id or "",
+            "blob": access_token,
+        }
         async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(f"{base}?action=getInfo&version=2.7.1") as resp:
-                if resp.status != 200:
-                    return None
-                info = await resp.json(content_type=None)
-
-            device_id = info.get("deviceID") or info.get("deviceId") or ""
-            if info.get("tokenType") != "accesstoken":
-                _LOG.debug("Zeroconf: device %s tokenType=%r not activatable via access token",
-                           device_id, info.get("tokenType"))
-                return None
-
-            data = {
-                "action": "addUser",
-                "version": "2.7.1",
-                "tokenType": "accesstoken",
-                "clientKey": "",
-                "loginId": login_id or "",
-                "userName": login_id or "",
-                "blob": access_token,
-            }
             async with session.post(base, data=data) as resp:
                 if resp.status != 200:
                     return None
@@ -211,24 +252,32 @@ async def activate_connect_device(
         return None
 
 
-async def _query_device_info(ip: str, port: int, cpath: str) -> dict[str, str] | None:
-    """Query a Spotify Connect device's getInfo endpoint."""
-    url = f"http://{ip}:{port}{cpath}?action=getInfo&version=2.7.1"
+async def _query_device_info(ip: str, port: int, cpath: str) -> dict[str, Any] | None:
+    """Query a Spotify Connect device's getInfo endpoint and return the raw response."""
+    url = f"http://{ip}:{port}{cpath}?action=getInfo&version={ZEROCONF_VERSION}"
     try:
         timeout = aiohttp.ClientTimeout(total=4)
         async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.get(url) as resp:
                 if resp.status == 200:
                     data = await resp.json(content_type=None)
-                    device_id = data.get("deviceID") or data.get("deviceId", "")
-                    remote_name = data.get("remoteName", "")
-                    if not remote_name or _is_junk_name(remote_name):
-                        aliases = data.get("aliases", [])
-                        if aliases:
-                            alias = aliases[0] if isinstance(aliases[0], str) else aliases[0].get("name", "")
-                            if alias and not _is_junk_name(alias):
-                                remote_name = alias
-                    return {"name": remote_name, "device_id": device_id}
+                    if isinstance(data, dict):
+                        return data
     except Exception as err:
         _LOG.debug("Zeroconf: getInfo query failed for %s:%s: %s", ip, port, err)
     return None
+
+
+def _info_device_id(info: dict[str, Any]) -> str:
+    return info.get("deviceID") or info.get("deviceId") or ""
+
+
+def _info_friendly_name(info: dict[str, Any]) -> str:
+    remote_name = info.get("remoteName", "")
+    if not remote_name or _is_junk_name(remote_name):
+        aliases = info.get("aliases", [])
+        if aliases:
+            alias = aliases[0] if isinstance(aliases[0], str) else aliases[0].get("name", "")
+            if alias and not _is_junk_name(alias):
+                remote_name = alias
+    return remote_name
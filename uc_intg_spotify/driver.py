@@ -1,13 +1,23 @@
 """Spotify integration driver. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
 from ucapi_framework import BaseIntegrationDriver
 
 from uc_intg_spotify.config import SpotifyDeviceConfig
 from uc_intg_spotify.device import SpotifyDevice
 from uc_intg_spotify.media_player import SpotifyMediaPlayer
 from uc_intg_spotify.remote import SpotifyRemote
+from uc_intg_spotify.scheduler import PollScheduler
 from uc_intg_spotify.select import SpotifyDeviceSelect
 from uc_intg_spotify.sensor import SpotifyNowPlayingSensor, SpotifyDeviceSensor
 
+if TYPE_CHECKING:
+    from uc_intg_spotify.artcache import ArtworkCache
+
+_LOG = logging.getLogger(__name__)
+
 
 class SpotifyDriver(BaseIntegrationDriver[SpotifyDevice, SpotifyDeviceConfig]):
     """Spotify integration driver."""
@@ -25,3 +35,21 @@ class SpotifyDriver(BaseIntegrationDriver[SpotifyDevice, SpotifyDeviceConfig]):
             driver_id="spotify",
             require_connection_before_registry=True,
         )
+        self.poll_scheduler = PollScheduler()
+        self.artwork: "ArtworkCache | None" = None
+        self.startup_timings: dict[str, dict[str, float]] = {}
+
+    async def register_all_device_instances(self, connect: bool = False) -> None:
+        """Connect, warm up and register every configured account concurrently."""
+        if self.config_manager is None:
+            await super().register_all_device_instances(connect)
+            return
+        await asyncio.gather(*(self.async_add_configured_device(cfg) for cfg in self.config_manager.all()))
+        for device in self._device_instances.values():
+            self.startup_timings[device.identifier] = device.warm_up_timings
+
+    async def shutdown(self) -> None:
+        """Stop the artwork proxy, which outlives the devices."""
+        if self.artwork:
+            await self.artwork.stop()
+            self.artwork = None
@@ -0,0 +1,460 @@
+"""Spotify local library index. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+import unicodedata
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from uc_intg_spotify.client import SpotifyClient
+    from uc_intg_spotify.librarystore import LibraryStore, Row
+
+_LOG = logging.getLogger(__name__)
+
+KIND_TRACK = "track"
+KIND_ALBUM = "album"
+KIND_PLAYLIST = "playlist"
+KIND_ARTIST = "artist"
+KINDS = (KIND_TRACK, KIND_ALBUM, KIND_PLAYLIST, KIND_ARTIST)
+
+LIBRARY_SYNC_INTERVAL = 900  # seconds between incremental syncs
+LIBRARY_PAGE_SIZE = 50
+LIBRARY_SYNC_HEADROOM = 2  # API budget tokens a sync page waits for
+SEARCH_MAX_RESULTS = 20
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_SCORE_EXACT = 3.0
+_SCORE_PREFIX = 2.0
+_SCORE_FUZZY = 1.0
+_NAME_BONUS = 0.5  # a match in the item's own name beats one in its artist/owner
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents, so "Beyoncé" and "beyonce" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def compact_item(kind: str, item: dict[str, Any]) -> dict[str, Any]:
+    """Keep only the fields browse items are built from."""
+    images = item.get("images") or (item.get("album") or {}).get("images") or []
+    image = [{"url": i.get("url"), "width": i.get("width"), "height": i.get("height")} for i in images]
+    if kind == KIND_TRACK:
+        album = item.get("album") or {}
+        return {
+            "id": item.get("id", ""),
+            "name": item.get("name", ""),
+            "uri": item.get("uri", ""),
+            "artists": [{"name": a.get("name", "")} for a in item.get("artists", [])],
+            "album": {"name": album.get("name", ""), "images": image},
+            "duration_ms": item.get("duration_ms", 0),
+            "is_playable": item.get("is_playable", True),
+        }
+    compact = {"id": item.get("id", ""), "name": item.get("name", ""), "uri": item.get("uri", ""), "images": image}
+    if kind == KIND_ALBUM:
+        compact["artists"] = [{"name": a.get("name", "")} for a in item.get("artists", [])]
+    elif kind == KIND_PLAYLIST:
+        compact["owner"] = {"display_name": (item.get("owner") or {}).get("display_name", "")}
+        compact["snapshot_id"] = item.get("snapshot_id", "")
+    return compact
+
+
+def _subtitle(kind: str, item: dict[str, Any]) -> str:
+    if kind == KIND_PLAYLIST:
+        return item.get("owner", {}).get("display_name", "")
+    return " ".join(a.get("name", "") for a in item.get("artists", []))
+
+
+def _within_edits(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance of ``a`` and ``b`` is at most ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class LibraryIndex:
+    """In-memory index of the user's saved tracks, saved albums, playlists and
+    followed artists, searchable by token prefix with a small typo tolerance.
+
+    Saved tracks and albums are listed newest first by the API, so a sync only reads
+    pages until it reaches items older than the last ``added_at`` seen. If the API
+    total then differs from the local count (something was removed), that kind is
+    read in full again. Playlists and followed artists are short lists and are read
+    in full on every sync.
+
+    With a ``LibraryStore`` the index is mirrored to SQLite: it starts from the
+    mirror after a restart, browse pages of a kind are served from it once that kind
+    was loaded or synced (until then browse asks the API), and the tracks of browsed
+    playlists are kept until the playlist's ``snapshot_id`` moves.
+    """
+
+    def __init__(self, store: LibraryStore | None = None) -> None:
+        self._store = store
+        self._loaded = store is None
+        self._items: dict[str, dict[str, dict[str, Any]]] = {kind: {} for kind in KINDS}
+        self._added: dict[str, dict[str, str]] = {KIND_TRACK: {}, KIND_ALBUM: {}}
+        self._watermarks: dict[str, str] = {}
+        self._totals: dict[str, int] = {}  # saved entries the API reported at the last sync
+        self._postings: dict[str, set[tuple[str, str]]] = {}
+        self._name_tokens: dict[tuple[str, str], set[str]] = {}
+        self._tokens: list[str] = []
+        self._tokens_dirty = False
+        self._synced = 0.0
+        self._kinds_ready: set[str] = set()  # kinds loaded from the mirror or synced
+        self._sync_task: asyncio.Task[None] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._synced > 0
+
+    def serves_pages(self, kind: str) -> bool:
+        """Whether browse pages of ``kind`` can be answered from the local mirror."""
+        return self._store is not None and kind in self._kinds_ready
+
+    def counts(self) -> dict[str, int]:
+        return {kind: len(items) for kind, items in self._items.items()}
+
+    def item(self, kind: str, item_id: str) -> dict[str, Any] | None:
+        return self._items[kind].get(item_id)
+
+    # ── Sync ──
+
+    def schedule_sync(self, client: SpotifyClient, force: bool = False) -> None:
+        if not force and time.time() - self._synced < LIBRARY_SYNC_INTERVAL:
+            return
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self.sync(client))
+
+    async def cancel(self) -> None:
+        if self._sync_task and not self._sync_task.done():
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+        self._sync_task = None
+        if self._store:
+            self._store.close()
+
+    async def load(self) -> None:
+        """Fill the index from the on-disk mirror, once."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            loaded = await self._store.load()
+        except Exception as err:
+            _LOG.warning("Could not read library mirror: %s", err)
+            return
+        for kind, rows in loaded.items():
+            if kind not in self._items:
+                continue
+            for item, added_at in rows:
+                self._add(kind, item)
+                if kind in self._added:
+                    self._added[kind][item["id"]] = added_at
+            if rows:
+                self._kinds_ready.add(kind)
+            if self._added.get(kind):
+                self._watermarks[kind] = max(self._added[kind].values())
+        _LOG.debug("Library loaded from mirror: %s", self.counts())
+
+    async def sync(self, client: SpotifyClient) -> None:
+        started = time.monotonic()
+        try:
+            await self.load()
+            await self._sync_saved(client, KIND_TRACK, client.get_saved_tracks, "track")
+            await self._sync_saved(client, KIND_ALBUM, client.get_saved_albums, "album")
+            await self._sync_playlists(client)
+            await self._sync_artists(client)
+        except Exception as err:  # keep what was indexed so far
+            _LOG.warning("Library sync failed: %s", err)
+            return
+        self._synced = time.time()
+        _LOG.debug("Library synced in %.1f s: %s", time.monotonic() - started, self.counts())
+
+    async def _page(self, client: SpotifyClient, request: Callable[..., Awaitable[Any]], **kwargs: Any) -> Any:
+        budget = client.api_budget
+        if budget:
+            await budget.wait_for_headroom(LIBRARY_SYNC_HEADROOM)
+        return await request(limit=LIBRARY_PAGE_SIZE, **kwargs)
+
+    async def _sync_saved(
+        self, client: SpotifyClient, kind: str, request: Callable[..., Awaitable[Any]], field: str
+    ) -> None:
+        watermark = self._watermarks.get(kind, "")
+        full = not watermark
+        fetched: dict[str, tuple[dict[str, Any], str]] = {}
+        # Entries as the API counts them, including unavailable (id-less) ones and
+        # repeats, so they can be compared with its ``total``.
+        known = self._totals.get(kind, len(self._items[kind]))
+        received = 0
+        offset = 0
+        total = 0
+        while True:
+            data = await self._page(client, request, offset=offset)
+            if not data:
+                raise ConnectionError(f"saved {kind}s page at {offset} unavailable")
+            total = data.get("total", 0)
+            reached_known = False
+            for entry in data.get("items", []):
+                obj = entry.get(field) or {}
+                added_at = entry.get("added_at", "")
+                if not full and obj.get("id") and added_at <= watermark and obj["id"] in self._items[kind]:
+                    reached_known = True
+                    break
+                received += 1
+                if obj.get("id"):
+                    fetched[obj["id"]] = (obj, added_at)
+            offset += LIBRARY_PAGE_SIZE
+            if reached_known or not data.get("next") or offset >= total:
+                break
+
+        if full:
+            self._replace(kind, {})
+        rows: list[Row] = []
+        for item_id, (obj, added_at) in fetched.items():
+            item = compact_item(kind, obj)
+            self._add(kind, item)
+            self._added[kind][item_id] = added_at
+            rows.append((item_id, 0, added_at, "", item))
+        if self._added[kind]:
+            self._watermarks[kind] = max(self._added[kind].values())
+        if self._store and (full or rows):
+            await (self._store.replace if full else self._store.upsert)(kind, rows)
+
+        if not full and total != known + received:
+            _LOG.debug("Saved %ss changed beyond new additions (%d != %d), reloading", kind, total,
+                       known + received)
+            self._watermarks.pop(kind, None)
+            await self._sync_saved(client, kind, request, field)
+            return
+        self._totals[kind] = received if full else total
+        self._kinds_ready.add(kind)
+
+    async def _sync_playlists(self, client: SpotifyClient) -> None:
+        items: dict[str, dict[str, Any]] = {}
+        offset = 0
+        while True:
+            data = await self._page(client, client.get_user_playlists, offset=offset)
+            if not data:
+                raise ConnectionError(f"playlists page at {offset} unavailable")
+            for playlist in data.get("items", []):
+                if playlist and playlist.get("id"):
+                    items[playlist["id"]] = compact_item(KIND_PLAYLIST, playlist)
+            offset += LIBRARY_PAGE_SIZE
+            if not data.get("next") or offset >= data.get("total", 0):
+                break
+        previous = {k: v.get("snapshot_id", "") for k, v in self._items[KIND_PLAYLIST].items()}
+        self._replace(KIND_PLAYLIST, items)
+        if self._store:
+            await self._store.replace(KIND_PLAYLIST, _positioned(items))
+        self._kinds_ready.add(KIND_PLAYLIST)
+        if self._store:
+            await self._refresh_playlist_tracks(client, previous)
+
+    async def _refresh_playlist_tracks(self, client: SpotifyClient, previous: dict[str, str]) -> None:
+        """Refetch mirrored playlist tracks only where the snapshot_id moved."""
+        mirrored = await self._store.mirrored_playlists()
+        removed = [pid for pid in mirrored if pid not in self._items[KIND_PLAYLIST]]
+        if removed:
+            await self._store.drop_playlist_tracks(removed)
+        for playlist_id, snapshot_id in mirrored.items():
+            current = self._items[KIND_PLAYLIST].get(playlist_id)
+            if current is None or current.get("snapshot_id") == snapshot_id:
+                continue
+            _LOG.debug("Playlist %s changed (%s -> %s), refetching", playlist_id,
+                       previous.get(playlist_id, snapshot_id), current.get("snapshot_id"))
+            budget = client.api_budget
+            if budget:
+                await budget.wait_for_headroom(LIBRARY_SYNC_HEADROOM)
+            data = await client.get_playlist(playlist_id)
+            if data:
+                await self.store_playlist(playlist_id, data)
+            else:
+                await self._store.drop_playlist_tracks([playlist_id])
+
+    async def _sync_artists(self, client: SpotifyClient) -> None:
+        items: dict[str, dict[str, Any]] = {}
+        after = None
+        while True:
+            data = await self._page(client, client.get_followed_artists, after=after)
+            if not data:
+                raise ConnectionError("followed artists page unavailable")
+            artists = data.get("artists", {})
+            for artist in artists.get("items", []):
+                if artist.get("id"):
+                    items[artist["id"]] = compact_item(KIND_ARTIST, artist)
+            after = (artists.get("cursors") or {}).get("after")
+            if not after or not artists.get("next"):
+                break
+        self._replace(KIND_ARTIST, items)
+        if self._store:
+            await self._store.replace(KIND_ARTIST, _positioned(items))
+        self._kinds_ready.add(KIND_ARTIST)
+
+    # ── Mirror queries ──
+
+    async def page(self, kind: str, offset: int, limit: int) -> tuple[list[dict[str, Any]], int] | None:
+        """A browse page of ``kind`` from the mirror, or None to ask the API instead."""
+        if not self.serves_pages(kind):
+            return None
+        try:
+            return await self._store.page(kind, offset, limit)
+        except Exception as err:
+            _LOG.warning("Library mirror query failed: %s", err)
+            return None
+
+    async def playlist_tracks(self, playlist_id: str) -> list[dict[str, Any]] | None:
+        playlist = self._items[KIND_PLAYLIST].get(playlist_id)
+        if self._store is None or not playlist or not playlist.get("snapshot_id"):
+            return None
+        try:
+            return await self._store.playlist_tracks(playlist_id, playlist["snapshot_id"])
+        except Exception as err:
+            _LOG.warning("Library mirror query failed: %s", err)
+            return None
+
+    async def store_playlist(self, playlist_id: str, data: dict[str, Any]) -> None:
+        """Mirror a fetched playlist's tracks if it is one of the user's playlists."""
+        playlist = self._items[KIND_PLAYLIST].get(playlist_id)
+        snapshot_id = data.get("snapshot_id", "")
+        if self._store is None or not playlist or not snapshot_id:
+            return
+        tracks_data = data.get("tracks") or data.get("items") or {}
+        if tracks_data.get("total", 0) > len(tracks_data.get("items", [])):
+            return  # only complete playlists are mirrored
+        tracks = [
+            compact_item(KIND_TRACK, entry["track"])
+            for entry in tracks_data.get("items", [])
+            if entry.get("track") and entry["track"].get("type") == "track"
+        ]
+        if playlist.get("snapshot_id") != snapshot_id:
+            playlist["snapshot_id"] = snapshot_id
+            await self._store.upsert(
+                KIND_PLAYLIST, [(playlist_id, self._position(playlist_id), "", snapshot_id, playlist)]
+            )
+        try:
+            await self._store.store_playlist_tracks(playlist_id, snapshot_id, tracks)
+        except Exception as err:
+            _LOG.warning("Could not mirror playlist %s: %s", playlist_id, err)
+
+    def _position(self, playlist_id: str) -> int:
+        return list(self._items[KIND_PLAYLIST]).index(playlist_id)
+
+    # ── Index maintenance ──
+
+    def _replace(self, kind: str, items: dict[str, dict[str, Any]]) -> None:
+        for item_id in list(self._items[kind]):
+            if item_id not in items:
+                self._remove(kind, item_id)
+        if kind in self._added:
+            self._added[kind] = {k: v for k, v in self._added[kind].items() if k in items}
+        for item in items.values():
+            self._add(kind, item)
+
+    def _add(self, kind: str, item: dict[str, Any]) -> None:
+        item_id = item["id"]
+        if item_id in self._items[kind]:
+            self._remove(kind, item_id)
+        self._items[kind][item_id] = item
+        key = (kind, item_id)
+        name_tokens = set(tokenize(item.get("name", "")))
+        self._name_tokens[key] = name_tokens
+        for token in name_tokens | set(tokenize(_subtitle(kind, item))):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._tokens_dirty = True
+            postings.add(key)
+
+    def _remove(self, kind: str, item_id: str) -> None:
+        item = self._items[kind].pop(item_id, None)
+        if item is None:
+            return
+        key = (kind, item_id)
+        self._name_tokens.pop(key, None)
+        for token in set(tokenize(item.get("name", ""))) | set(tokenize(_subtitle(kind, item))):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[token]
+                    self._tokens_dirty = True
+
+    # ── Search ──
+
+    def search(
+        self, query: str, kinds: tuple[str, ...] = KINDS, limit: int = SEARCH_MAX_RESULTS
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """Return ``(kind, item)`` pairs matching every query token, best first.
+
+        A query token matches an indexed word exactly, as a prefix (so partly typed
+        words work), or failing both with one typo (two for words of 8+ letters).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if self._tokens_dirty:
+            self._tokens = sorted(self._postings)
+            self._tokens_dirty = False
+
+        scores: dict[tuple[str, str], float] | None = None
+        for term in terms:
+            term_scores = self._match_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(
+            ((key, score) for key, score in scores.items() if key[0] in kinds),
+            key=lambda pair: (-pair[1], KINDS.index(pair[0][0]), self._items[pair[0][0]][pair[0][1]].get("name", "")),
+        )
+        return [(kind, self._items[kind][item_id]) for (kind, item_id), _ in ranked[:limit]]
+
+    def _match_term(self, term: str) -> dict[tuple[str, str], float]:
+        matches: dict[str, float] = {}
+        start = bisect.bisect_left(self._tokens, term)
+        for token in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            matches[token] = _SCORE_EXACT if token == term else _SCORE_PREFIX
+        if not matches and len(term) >= 4:
+            edits = 2 if len(term) >= 8 else 1
+            # Typos rarely hit the first letter; only compare tokens that share it.
+            lo = bisect.bisect_left(self._tokens, term[0])
+            hi = bisect.bisect_left(self._tokens, chr(ord(term[0]) + 1))
+            for token in self._tokens[lo:hi]:
+                if _within_edits(term, token[:len(term) + edits], edits):
+                    matches[token] = _SCORE_FUZZY
+
+        scores: dict[tuple[str, str], float] = {}
+        for token, score in matches.items():
+            for key in self._postings.get(token, ()):
+                bonus = _NAME_BONUS if token in self._name_tokens.get(key, ()) else 0.0
+                if score + bonus > scores.get(key, 0.0):
+                    scores[key] = score + bonus
+        return scores
+
+
+def _positioned(items: dict[str, dict[str, Any]]) -> list[Row]:
+    return [(item_id, pos, "", item.get("snapshot_id", ""), item) for pos, (item_id, item) in enumerate(items.items())]
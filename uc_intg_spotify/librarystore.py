@@ -0,0 +1,165 @@
+"""Spotify library mirror on disk. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any
+
+_LOG = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    added_at TEXT NOT NULL DEFAULT '',
+    snapshot_id TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS items_added ON items (kind, added_at DESC, id);
+CREATE INDEX IF NOT EXISTS items_position ON items (kind, position);
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_id TEXT NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (playlist_id, position)
+);
+"""
+
+# Saved tracks and albums page newest first like the API; the other kinds keep the
+# API's own order.
+_ORDER = {"track": "added_at DESC, id", "album": "added_at DESC, id"}
+_DEFAULT_ORDER = "position"
+
+Row = tuple[str, int, str, str, dict[str, Any]]  # id, position, added_at, snapshot_id, data
+
+
+class LibraryStore:
+    """SQLite mirror of one account's library, kept under the integration config dir.
+
+    All queries run in a worker thread through one connection guarded by a lock, so
+    the event loop never blocks on disk I/O.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    # ── Async API ──
+
+    async def load(self) -> dict[str, list[tuple[dict[str, Any], str]]]:
+        """All items by kind as ``(data, added_at)``, in page order."""
+        return await self._run(self._load)
+
+    async def replace(self, kind: str, rows: list[Row]) -> None:
+        await self._run(self._write, kind, rows, True)
+
+    async def upsert(self, kind: str, rows: list[Row]) -> None:
+        await self._run(self._write, kind, rows, False)
+
+    async def page(self, kind: str, offset: int, limit: int) -> tuple[list[dict[str, Any]], int]:
+        return await self._run(self._page, kind, offset, limit)
+
+    async def playlist_tracks(self, playlist_id: str, snapshot_id: str) -> list[dict[str, Any]] | None:
+        """Mirrored tracks of a playlist, or None unless stored for this snapshot."""
+        return await self._run(self._playlist_tracks, playlist_id, snapshot_id)
+
+    async def mirrored_playlists(self) -> dict[str, str]:
+        return await self._run(self._mirrored_playlists)
+
+    async def store_playlist_tracks(self, playlist_id: str, snapshot_id: str, tracks: list[dict[str, Any]]) -> None:
+        await self._run(self._store_playlist_tracks, playlist_id, snapshot_id, tracks)
+
+    async def drop_playlist_tracks(self, playlist_ids: list[str]) -> None:
+        await self._run(self._drop_playlist_tracks, playlist_ids)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _run(self, func, *args):
+        return await asyncio.to_thread(self._locked, func, *args)
+
+    def _locked(self, func, *args):
+        with self._lock:
+            return func(self._connection(), *args)
+
+    # ── Worker thread ──
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS items; DROP TABLE IF EXISTS playlist_tracks;")
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection) -> dict[str, list[tuple[dict[str, Any], str]]]:
+        loaded: dict[str, list[tuple[dict[str, Any], str]]] = {}
+        for kind, data, added_at in conn.execute("SELECT kind, data, added_at FROM items ORDER BY kind, position"):
+            loaded.setdefault(kind, []).append((json.loads(data), added_at))
+        return loaded
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, kind: str, rows: list[Row], replace: bool) -> None:
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM items WHERE kind = ?", (kind,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (kind, id, position, added_at, snapshot_id, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(kind, item_id, pos, added, snap, json.dumps(data)) for item_id, pos, added, snap, data in rows],
+            )
+
+    @staticmethod
+    def _page(conn: sqlite3.Connection, kind: str, offset: int, limit: int) -> tuple[list[dict[str, Any]], int]:
+        order = _ORDER.get(kind, _DEFAULT_ORDER)
+        rows = conn.execute(
+            f"SELECT data FROM items WHERE kind = ? ORDER BY {order} LIMIT ? OFFSET ?", (kind, limit, offset)
+        ).fetchall()
+        total = conn.execute("SELECT COUNT(*) FROM items WHERE kind = ?", (kind,)).fetchone()[0]
+        return [json.loads(data) for (data,) in rows], total
+
+    @staticmethod
+    def _playlist_tracks(conn: sqlite3.Connection, playlist_id: str, snapshot_id: str) -> list[dict[str, Any]] | None:
+        rows = conn.execute(
+            "SELECT snapshot_id, data FROM playlist_tracks WHERE playlist_id = ? ORDER BY position", (playlist_id,)
+        ).fetchall()
+        if not rows or rows[0][0] != snapshot_id:
+            return None
+        return [json.loads(data) for _, data in rows]
+
+    @staticmethod
+    def _mirrored_playlists(conn: sqlite3.Connection) -> dict[str, str]:
+        return dict(conn.execute("SELECT DISTINCT playlist_id, snapshot_id FROM playlist_tracks"))
+
+    @staticmethod
+    def _store_playlist_tracks(
+        conn: sqlite3.Connection, playlist_id: str, snapshot_id: str, tracks: list[dict[str, Any]]
+    ) -> None:
+        with conn:
+            conn.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            conn.executemany(
+                "INSERT INTO playlist_tracks (playlist_id, snapshot_id, position, data) VALUES (?, ?, ?, ?)",
+                [(playlist_id, snapshot_id, pos, json.dumps(track)) for pos, track in enumerate(tracks)],
+            )
+
+    @staticmethod
+    def _drop_playlist_tracks(conn: sqlite3.Connection, playlist_ids: list[str]) -> None:
+        with conn:
+            conn.executemany("DELETE FROM playlist_tracks WHERE playlist_id = ?", [(i,) for i in playlist_ids])
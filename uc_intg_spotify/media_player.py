@@ -8,7 +8,6 @@ from ucapi import media_player, StatusCodes
 from ucapi.media_player import BrowseOptions, BrowseResults, SearchOptions, SearchResults
 from ucapi_framework import MediaPlayerEntity
 
-from uc_intg_spotify import browser
 from uc_intg_spotify.config import account_suffix
 
 if TYPE_CHECKING:
@@ -102,13 +101,27 @@ class SpotifyMediaPlayer(MediaPlayerEntity):
         client = self._device.client
         if not client or not client.is_authenticated():
             return StatusCodes.SERVICE_UNAVAILABLE
-        return await browser.browse(client, options)
+        from uc_intg_spotify import browser  # browse machinery loads on first use
+
+        return await browser.browse(
+            client,
+            options,
+            queue=self._device.queue,
+            account=self._device.identifier,
+            root_thumbnails=self._device.root_thumbnails,
+            prefetch_budget=self._device.browse_prefetch_budget,
+            library=self._device.library,
+        )
 
     async def search(self, options: SearchOptions) -> SearchResults | StatusCodes:
         client = self._device.client
         if not client or not client.is_authenticated():
             return StatusCodes.SERVICE_UNAVAILABLE
-        return await browser.search(client, options)
+        from uc_intg_spotify import browser
+
+        return await browser.search(
+            client, options, library=self._device.library, session=self._device.search_session
+        )
 
     async def _handle_command(
         self, entity: media_player.MediaPlayer, cmd_id: str, params: dict[str, Any] | None
@@ -124,112 +137,15 @@ class SpotifyMediaPlayer(MediaPlayerEntity):
             return StatusCodes.SERVER_ERROR
 
     async def _dispatch_command(self, client, cmd_id: str, params: dict[str, Any] | None) -> StatusCodes:
-        if cmd_id == media_player.Commands.ON:
-            return StatusCodes.OK
-
-        if cmd_id == media_player.Commands.OFF:
-            ok = await client.pause()
-            if ok:
-                self._device.set_playing_state(False)
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.PLAY_PAUSE:
-            if self._device._is_playing:
-                ok = await client.pause()
-                is_playing = False
-            else:
-                device_id = self._device.get_first_available_device_id()
-                ok = await client.play(device_id)
-                is_playing = True
-            if ok:
-                self._device.set_playing_state(is_playing)
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.NEXT:
-            ok = await client.next_track()
-            if ok:
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.PREVIOUS:
-            ok = await client.previous_track()
-            if ok:
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.VOLUME:
-            volume = int(params.get("volume", 50)) if params else 50
-            ok = await client.set_volume(volume)
-            if ok:
-                self._device.set_volume_state(volume)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.VOLUME_UP:
-            new_vol = min(100, self._device._volume + 1)
-            ok = await client.set_volume(new_vol)
-            if ok:
-                self._device.set_volume_state(new_vol)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.VOLUME_DOWN:
-            new_vol = max(0, self._device._volume - 1)
-            ok = await client.set_volume(new_vol)
-            if ok:
-                self._device.set_volume_state(new_vol)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.MUTE_TOGGLE:
-            volume = self._device.get_unmute_volume() if self._device._muted else 0
-            ok = await client.set_volume(volume)
-            if ok:
-                self._device.set_volume_state(volume)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.MUTE:
-            ok = await client.set_volume(0)
-            if ok:
-                self._device.set_volume_state(0)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.UNMUTE:
-            volume = self._device.get_unmute_volume()
-            ok = await client.set_volume(volume)
-            if ok:
-                self._device.set_volume_state(volume)
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.SEEK:
-            position = params.get("media_position", 0) if params else 0
-            ok = await client.seek(int(position) * 1000)
-            if ok:
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.SHUFFLE:
-            shuffle = _parse_shuffle_param(params, self._device._shuffle)
-            ok = await client.set_shuffle(shuffle)
-            if ok:
-                self._device.set_shuffle_state(shuffle)
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
-        if cmd_id == media_player.Commands.REPEAT:
-            cycle = {"off": "context", "context": "track", "track": "off"}
-            new_state = _parse_repeat_param(params, cycle.get(self._device._repeat, "off"))
-            ok = await client.set_repeat(new_state)
-            if ok:
-                self._device.set_repeat_state(new_state)
-                self._device.schedule_playback_refresh()
-            return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
-
         if cmd_id == media_player.Commands.SELECT_SOURCE:
             return await self._handle_select_source(client, params)
 
         if cmd_id == media_player.Commands.PLAY_MEDIA:
             return await self._handle_play_media(client, params)
 
+        if self._device.commands.supports(cmd_id):
+            return await self._device.commands.execute(cmd_id, params)
+
         _LOG.warning("Unhandled command: %s", cmd_id)
         return StatusCodes.NOT_IMPLEMENTED
 
@@ -265,6 +181,12 @@ class SpotifyMediaPlayer(MediaPlayerEntity):
                 target_volume = self._device.get_device_volume(device_id)
 
         ok = await client.play_uri(uri, device_id)
+        if ok:
+            from uc_intg_spotify import browser
+
+            self._device.queue.invalidate()
+            browser.invalidate(self._device.identifier, "queue")
+            browser.invalidate(self._device.identifier, "recently_played")
         if ok and device_id and target_volume is not None:
             await client.set_volume(target_volume, device_id)
         return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
@@ -283,33 +205,6 @@ def _media_id_to_uri(media_id: str) -> str:
     return ""
 
 
-def _parse_shuffle_param(params: dict[str, Any] | None, current: bool) -> bool:
-    if not params or "shuffle" not in params:
-        return not current
-    value = params["shuffle"]
-    if isinstance(value, bool):
-        return value
-    return str(value).lower() in ("1", "true", "yes", "on")
-
-
-def _parse_repeat_param(params: dict[str, Any] | None, default: str) -> str:
-    if params:
-        value = params.get("repeat")
-        if value is not None:
-            mapping = {
-                "off": "off",
-                "none": "off",
-                "all": "context",
-                "context": "context",
-                "one": "track",
-                "track": "track",
-            }
-            mapped = mapping.get(str(getattr(value, "value", value)).lower())
-            if mapped:
-                return mapped
-    return default
-
-
 def _repeat_to_uc(repeat: str) -> media_player.RepeatMode:
     mapping = {
         "off": media_player.RepeatMode.OFF,
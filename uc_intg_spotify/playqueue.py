@@ -0,0 +1,101 @@
+"""Spotify playback queue model. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Callable
+
+from uc_intg_spotify.artwork import ARTWORK_NOW_PLAYING, pick_image
+
+if TYPE_CHECKING:
+    from uc_intg_spotify.client import SpotifyClient
+
+_LOG = logging.getLogger(__name__)
+
+
+def queue_item_snapshot(item: dict[str, Any]) -> dict[str, Any]:
+    """Reduce a queue item (track or episode) to the fields shown as now playing."""
+    album = item.get("album") or {}
+    images = album.get("images") or item.get("images") or []
+    artists = item.get("artists")
+    if artists:
+        artist = ", ".join(a.get("name", "") for a in artists)
+    else:
+        artist = (item.get("show") or {}).get("name", "")
+    return {
+        "uri": item.get("uri", ""),
+        "title": item.get("name", ""),
+        "artist": artist,
+        "album": album.get("name", ""),
+        "image_url": pick_image(images, ARTWORK_NOW_PLAYING) or "",
+        "duration": item.get("duration_ms", 0) // 1000,
+    }
+
+
+class PlaybackQueue:
+    """Device-side copy of ``/me/player/queue``.
+
+    The queue is refetched only when the playing item or context changes, or after a
+    command that edits it (``add_to_queue``, ``play_uri``). Browse, next-track
+    prediction and artwork prefetch all read this copy instead of calling the
+    endpoint themselves.
+    """
+
+    def __init__(self, on_change: Callable[[list[dict[str, Any]]], None] | None = None) -> None:
+        self._on_change = on_change
+        self._data: dict[str, Any] | None = None
+        self._upcoming: list[dict[str, Any]] = []
+        self._key: tuple[str, str] = ("", "")
+        self._stale = True
+        self._refresh_task: asyncio.Task[dict[str, Any] | None] | None = None
+
+    @property
+    def upcoming(self) -> list[dict[str, Any]]:
+        """Snapshots of the queued items, soonest first."""
+        return self._upcoming
+
+    def track(self, client: SpotifyClient, uri: str, context_uri: str) -> None:
+        """Note the confirmed playing item; refresh in the background if it moved."""
+        key = (uri, context_uri)
+        if key != self._key:
+            self._key = key
+            self._stale = True
+        if self._stale and uri:
+            self.schedule_refresh(client)
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def schedule_refresh(self, client: SpotifyClient) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh(client))
+
+    async def get(self, client: SpotifyClient) -> dict[str, Any] | None:
+        """Return the queue, refetching only if it is stale."""
+        if not self._stale and self._data is not None:
+            return self._data
+        self.schedule_refresh(client)
+        return await asyncio.shield(self._refresh_task)
+
+    async def cancel(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    async def _refresh(self, client: SpotifyClient) -> dict[str, Any] | None:
+        key = self._key
+        data = await client.get_queue()
+        if data is None:
+            return self._data
+        self._data = data
+        previous = [item["uri"] for item in self._upcoming]
+        self._upcoming = [queue_item_snapshot(item) for item in data.get("queue", []) if item]
+        self._stale = key != self._key
+        _LOG.debug("Queue refreshed: %d upcoming items", len(self._upcoming))
+        if self._on_change and [item["uri"] for item in self._upcoming] != previous:
+            self._on_change(self._upcoming)
+        return data
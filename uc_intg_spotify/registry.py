@@ -0,0 +1,285 @@
+"""Spotify Connect device registry. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Iterator
+
+from uc_intg_spotify.discovery import _is_junk_name
+
+_LOG = logging.getLogger(__name__)
+
+_HEX_HASH_RE = re.compile(r"^[0-9a-f]{32,}$", re.IGNORECASE)
+
+DEVICE_CACHE_TTL = 86400  # 24 hours
+ACTIVATION_TIMEOUT = 20.0
+ACTIVATION_MAX_API_CALLS = 8
+ACTIVATION_BACKOFF_START = 0.25
+ACTIVATION_BACKOFF_STEADY = 2.0
+
+_DEVICE_TYPE_LABELS = {
+    "Computer": "Computer",
+    "Smartphone": "Phone",
+    "Tablet": "Tablet",
+    "Speaker": "Speaker",
+    "TV": "TV",
+    "AVR": "Receiver",
+    "STB": "Set-Top Box",
+    "AudioDongle": "Audio Dongle",
+    "GameConsole": "Game Console",
+    "CastVideo": "Chromecast",
+    "CastAudio": "Cast Audio",
+    "Automobile": "Car",
+}
+
+
+def device_display_name(dev: dict[str, Any]) -> str:
+    """Build a user-friendly display name for a Spotify Connect device."""
+    override = dev.get("_display_name", "")
+    if override:
+        return override
+    name = dev.get("name", "")
+    if name and not _HEX_HASH_RE.match(name):
+        return name
+    dev_type = dev.get("type", "Device")
+    label = _DEVICE_TYPE_LABELS.get(dev_type, dev_type)
+    dev_id = dev.get("id", "")
+    return f"{label} ({dev_id[:6]})" if dev_id else label
+
+
+class DeviceRegistry:
+    """Merged view of Web API, cached and Zeroconf devices.
+
+    Lookups go through name and id indexes instead of scanning the three sources.
+    The id index follows every update; the setters compare a membership key (ids,
+    names, Zeroconf endpoints) and only mark the name indexes and source list dirty
+    when it changes, so :meth:`refresh` does nothing on steady-state polls.
+    """
+
+    def __init__(self) -> None:
+        self._api: dict[str, dict[str, Any]] = {}
+        self._cache: dict[str, dict[str, Any]] = {}
+        self._zeroconf: dict[str, dict[str, Any]] = {}
+        self._resolved_names: dict[str, str] = {}
+
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._by_name: dict[str, str] = {}
+        self._zc_by_name: dict[str, dict[str, Any]] = {}
+        self._source_list: list[str] = []
+        self._api_key: tuple[Any, ...] = ()
+        self._zeroconf_key: tuple[Any, ...] = ()
+        self._dirty = False
+
+    @property
+    def api_devices(self) -> list[dict[str, Any]]:
+        return list(self._api.values())
+
+    @property
+    def source_list(self) -> list[str]:
+        return self._source_list
+
+    def set_api_devices(self, devices: list[dict[str, Any]], now: float | None = None) -> None:
+        """Replace the Web API device set and refresh the 24h device cache."""
+        now = time.time() if now is None else now
+        self._api = {dev["id"]: dev for dev in devices if dev.get("id")}
+        for dev_id, dev in self._api.items():
+            if dev_id not in self._cache:
+                self._dirty = True
+            self._cache[dev_id] = {"device": dev, "last_seen": now}
+            self._by_id[dev_id] = dev
+        self._apply_resolved_names()
+
+        expired = [k for k, v in self._cache.items() if now - v["last_seen"] > DEVICE_CACHE_TTL]
+        for k in expired:
+            del self._cache[k]
+            del self._by_id[k]
+            self._dirty = True
+
+        key = tuple((dev_id, dev.get("name", ""), dev.get("type", "")) for dev_id, dev in self._api.items())
+        if key != self._api_key:
+            self._api_key = key
+            self._dirty = True
+
+    def set_zeroconf_devices(self, devices: dict[str, dict[str, Any]]) -> None:
+        """Replace the Zeroconf snapshot and fix API devices that only report hex hash names.
+
+        Resolved names are remembered by device id so enrichment survives transient
+        Zeroconf gaps (devices that only answer mDNS queries intermittently)."""
+        self._zeroconf = devices
+        key = tuple(
+            (service, zc.get("name", ""), zc.get("device_id", ""), zc.get("ip"), zc.get("port"), zc.get("cpath"))
+            for service, zc in devices.items()
+        )
+        if key == self._zeroconf_key:
+            return
+        self._zeroconf_key = key
+        self._dirty = True
+        for zc_dev in devices.values():
+            device_id = zc_dev.get("device_id", "")
+            name = zc_dev.get("name", "")
+            if device_id and name and not _is_junk_name(name):
+                self._resolved_names[device_id] = name
+        self._apply_resolved_names()
+
+    def _apply_resolved_names(self) -> None:
+        for dev_id, dev in self._api.items():
+            api_name = dev.get("name", "")
+            if api_name and _HEX_HASH_RE.match(api_name):
+                resolved_name = self._resolved_names.get(dev_id, "")
+                if resolved_name:
+                    dev["_display_name"] = resolved_name
+
+    def refresh(self) -> bool:
+        """Rebuild indexes if membership changed. Returns True when the source list changed."""
+        if not self._dirty:
+            return False
+        self._dirty = False
+        api_names = [(dev_id, device_display_name(dev)) for dev_id, dev in self._api.items()]
+        cache_names = [
+            (dev_id, device_display_name(entry["device"]))
+            for dev_id, entry in self._cache.items()
+            if dev_id not in self._api
+        ]
+        zc_entries = self._zeroconf_key
+
+        by_name: dict[str, str] = {}
+        for dev_id, name in api_names + cache_names:
+            by_name.setdefault(name, dev_id)
+        zc_by_name: dict[str, dict[str, Any]] = {}
+        for service, name, device_id, ip, port, _ in zc_entries:
+            if not name:
+                continue
+            if device_id:
+                by_name.setdefault(name, device_id)
+            if ip and port:
+                zc_by_name.setdefault(name, self._zeroconf[service])
+        self._by_name = by_name
+        self._zc_by_name = zc_by_name
+
+        seen_names: set[str] = set()
+        source_list: list[str] = []
+        candidates = (
+            [name for _, name in api_names]
+            + [entry[1] for entry in zc_entries if not _is_junk_name(entry[1])]
+            + [name for _, name in cache_names]
+        )
+        for name in candidates:
+            if name not in seen_names:
+                seen_names.add(name)
+                source_list.append(name)
+
+        changed = source_list != self._source_list
+        self._source_list = source_list
+        return changed
+
+    def device_id_by_name(self, name: str) -> str | None:
+        return self._by_name.get(name)
+
+    def zeroconf_device_by_name(self, name: str) -> dict[str, Any] | None:
+        """Return a Zeroconf device with a usable LAN endpoint for a display name."""
+        return self._zc_by_name.get(name)
+
+    def is_api_device(self, device_id: str) -> bool:
+        return device_id in self._api
+
+    def api_device(self, device_id: str) -> dict[str, Any] | None:
+        return self._api.get(device_id)
+
+    def device(self, device_id: str) -> dict[str, Any] | None:
+        return self._by_id.get(device_id)
+
+    def device_volume(self, device_id: str) -> int | None:
+        dev = self._api.get(device_id)
+        if dev and dev.get("supports_volume"):
+            return dev.get("volume_percent")
+        return None
+
+    def first_api_device_id(self) -> str | None:
+        return next(iter(self._api), None)
+
+    def resolve_api_device(self, device_id: str, name: str) -> str | None:
+        """Return the Web API id for a device known by id or display name, if registered."""
+        if device_id and device_id in self._api:
+            return device_id
+        name_id = self._by_name.get(name) if name else None
+        return name_id if name_id and name_id in self._api else None
+
+
+def _activation_backoff() -> Iterator[float]:
+    delay = ACTIVATION_BACKOFF_START
+    while True:
+        yield delay
+        delay = min(delay * 2, ACTIVATION_BACKOFF_STEADY)
+
+
+class ActivationWaiter:
+    """Waits for a freshly activated Connect device to appear in the Web API device list.
+
+    Checks follow an exponential-then-steady backoff and are capped at
+    ``ACTIVATION_MAX_API_CALLS`` device-list requests. Any other device-list refresh
+    (regular polls included) calls :meth:`notify`, which wakes matching waiters early
+    without spending an extra request.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[asyncio.Event, tuple[str, str]] = {}
+        self.metrics: dict[str, dict[str, Any]] = {}
+
+    def notify(self, registry: DeviceRegistry) -> None:
+        for event, (device_id, name) in self._pending.items():
+            if registry.resolve_api_device(device_id, name):
+                event.set()
+
+    async def wait(
+        self,
+        registry: DeviceRegistry,
+        device_id: str,
+        name: str,
+        fetch_devices: Callable[[], Awaitable[None]],
+    ) -> str | None:
+        """Wait until the device is registered and return its Web API id, or None on timeout."""
+        started = time.monotonic()
+        deadline = started + ACTIVATION_TIMEOUT
+        api_calls = 0
+        woken = False
+        match = None
+        event = asyncio.Event()
+        self._pending[event] = (device_id, name)
+        try:
+            for delay in _activation_backoff():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), min(delay, remaining))
+                    event.clear()  # a set event would turn the remaining waits into a busy loop
+                    woken = True
+                except asyncio.TimeoutError:
+                    pass
+                match = registry.resolve_api_device(device_id, name)
+                if match:
+                    break
+                if api_calls < ACTIVATION_MAX_API_CALLS:
+                    api_calls += 1
+                    await fetch_devices()
+                    match = registry.resolve_api_device(device_id, name)
+                    if match:
+                        break
+        finally:
+            del self._pending[event]
+
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        stats = self.metrics.setdefault(name or device_id, {"attempts": 0, "ready": 0, "api_calls": 0})
+        stats["attempts"] += 1
+        stats["api_calls"] += api_calls
+        stats["last_ms"] = elapsed_ms
+        if match:
+            stats["ready"] += 1
+            stats["woken_by_refresh"] = woken
+            _LOG.info(
+                "Connect device '%s' ready after %d ms (%d device list requests)",
+                name or device_id, elapsed_ms, api_calls,
+            )
+        return match
@@ -73,91 +73,24 @@ class SpotifyRemote(RemoteEntity):
 
         try:
             if cmd_id == remote.Commands.SEND_CMD:
-                return await self._handle_send_cmd(client, params)
+                return await self._handle_send_cmd(params)
             return StatusCodes.NOT_IMPLEMENTED
         except Exception as err:
             _LOG.error("Remote command %s failed: %s", cmd_id, err)
             return StatusCodes.SERVER_ERROR
 
-    async def _handle_send_cmd(self, client, params: dict[str, Any] | None) -> StatusCodes:
+    async def _handle_send_cmd(self, params: dict[str, Any] | None) -> StatusCodes:
         if not params or "command" not in params:
             return StatusCodes.BAD_REQUEST
 
         command = params["command"]
-        ok = False
-
-        if command == "PLAY_PAUSE":
-            if self._device._is_playing:
-                ok = await client.pause()
-                is_playing = False
-            else:
-                device_id = self._device.get_first_available_device_id()
-                ok = await client.play(device_id)
-                is_playing = True
-            if ok:
-                self._device.set_playing_state(is_playing)
-                self._device.schedule_playback_refresh()
-        elif command == "PLAY":
-            device_id = self._device.get_first_available_device_id() if not self._device._is_playing else None
-            ok = await client.play(device_id)
-            if ok:
-                self._device.set_playing_state(True)
-                self._device.schedule_playback_refresh()
-        elif command == "PAUSE":
-            ok = await client.pause()
-            if ok:
-                self._device.set_playing_state(False)
-                self._device.schedule_playback_refresh()
-        elif command == "NEXT":
-            ok = await client.next_track()
-            if ok:
-                self._device.schedule_playback_refresh()
-        elif command == "PREVIOUS":
-            ok = await client.previous_track()
-            if ok:
-                self._device.schedule_playback_refresh()
-        elif command == "VOLUME_UP":
-            new_vol = min(100, self._device._volume + 1)
-            ok = await client.set_volume(new_vol)
-            if ok:
-                self._device.set_volume_state(new_vol)
-        elif command == "VOLUME_DOWN":
-            new_vol = max(0, self._device._volume - 1)
-            ok = await client.set_volume(new_vol)
-            if ok:
-                self._device.set_volume_state(new_vol)
-        elif command == "MUTE_TOGGLE":
-            volume = self._device.get_unmute_volume() if self._device._muted else 0
-            ok = await client.set_volume(volume)
-            if ok:
-                self._device.set_volume_state(volume)
-        elif command == "MUTE":
-            ok = await client.set_volume(0)
-            if ok:
-                self._device.set_volume_state(0)
-        elif command == "UNMUTE":
-            volume = self._device.get_unmute_volume()
-            ok = await client.set_volume(volume)
-            if ok:
-                self._device.set_volume_state(volume)
-        elif command == "SHUFFLE":
-            shuffle = not self._device._shuffle
-            ok = await client.set_shuffle(shuffle)
-            if ok:
-                self._device.set_shuffle_state(shuffle)
-                self._device.schedule_playback_refresh()
-        elif command == "REPEAT":
-            cycle = {"off": "context", "context": "track", "track": "off"}
-            repeat = cycle.get(self._device._repeat, "off")
-            ok = await client.set_repeat(repeat)
-            if ok:
-                self._device.set_repeat_state(repeat)
-                self._device.schedule_playback_refresh()
-        else:
+        # Only the parameterless commands the remote exposes; SEEK, VOLUME, ON and OFF
+        # need arguments or belong to the media player.
+        if command not in SIMPLE_COMMANDS or not self._device.commands.supports(command):
             _LOG.warning("Unknown remote command: %s", command)
             return StatusCodes.NOT_IMPLEMENTED
 
-        return StatusCodes.OK if ok else StatusCodes.SERVER_ERROR
+        return await self._device.commands.execute(command)
 
 
 def _create_ui_pages() -> list[UiPage]:
@@ -0,0 +1,95 @@
+"""Spotify poll scheduling across accounts. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+
+_LOG = logging.getLogger(__name__)
+
+API_BUDGET_RATE = 2.0  # sustained requests per second per client_id
+API_BUDGET_BURST = 40
+API_BUDGET_RESERVE = 10  # requests kept free for user commands
+POLL_JITTER = 0.1  # +/- fraction of the poll interval
+_GOLDEN_RATIO = 0.618033988749895
+
+
+class ApiBudget:
+    """Token bucket shared by every account that uses the same Spotify client_id.
+
+    Every Web API request spends a token and is never blocked, so user commands and
+    browsing go out immediately. Background work (polls, library sync, browse
+    prefetch) first waits until the bucket holds its cost on top of a reserve, which
+    keeps headroom for commands when the budget runs low.
+    """
+
+    def __init__(
+        self,
+        rate: float = API_BUDGET_RATE,
+        burst: int = API_BUDGET_BURST,
+        reserve: int = API_BUDGET_RESERVE,
+    ) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._reserve = reserve
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def consume(self, cost: int = 1) -> None:
+        self._refill()
+        self._tokens -= cost
+
+    async def wait_for_headroom(self, cost: int) -> None:
+        """Wait until ``cost`` requests fit without dipping into the command reserve."""
+        while True:
+            self._refill()
+            missing = cost + self._reserve - self._tokens
+            if missing <= 0:
+                return
+            await asyncio.sleep(missing / self._rate)
+
+
+class PollScheduler:
+    """Staggers background polls of all configured accounts.
+
+    Each account gets a fixed phase offset (golden-ratio spacing, so offsets stay
+    spread out however many accounts are added) plus per-cycle jitter, which keeps
+    accounts sharing a client_id from polling in lock-step.
+    """
+
+    def __init__(self) -> None:
+        self._budgets: dict[str, ApiBudget] = {}
+        self._slots: dict[str, int] = {}
+
+    def budget(self, client_id: str) -> ApiBudget:
+        if client_id not in self._budgets:
+            self._budgets[client_id] = ApiBudget()
+        return self._budgets[client_id]
+
+    def register(self, identifier: str) -> None:
+        if identifier not in self._slots:
+            used = set(self._slots.values())
+            self._slots[identifier] = next(i for i in range(len(used) + 1) if i not in used)
+            _LOG.debug("Poll slot %d assigned to %s", self._slots[identifier], identifier)
+
+    def unregister(self, identifier: str) -> None:
+        self._slots.pop(identifier, None)
+
+    def phase_delay(self, identifier: str, interval: float) -> float:
+        """Extra delay that places an account's polls at its own phase of the interval."""
+        slot = self._slots.get(identifier, 0)
+        return (slot * _GOLDEN_RATIO) % 1.0 * interval
+
+    def next_delay(self, interval: float) -> float:
+        return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
@@ -0,0 +1,131 @@
+"""Spotify search-as-you-type session. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from ucapi.media_player import BrowseMediaItem
+
+from uc_intg_spotify.library import normalize, tokenize
+
+_LOG = logging.getLogger(__name__)
+
+SEARCH_DEBOUNCE = 0.15  # seconds a query must stay current before it is sent
+SEARCH_CACHE_TTL = 120
+SEARCH_CACHE_SIZE = 64
+
+# (items, total) as returned by the remote search
+Page = tuple[list[BrowseMediaItem], int]
+Fetch = Callable[[], Awaitable[Page | None]]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(normalize(query).split())
+
+
+def _matches(item: BrowseMediaItem, terms: list[str]) -> bool:
+    words = tokenize(" ".join(filter(None, (item.title, item.artist, item.album, item.subtitle))))
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+class SearchSession:
+    """Per-account search pipeline for progressively typed queries.
+
+    A query is only sent after it has stayed the newest one for ``SEARCH_DEBOUNCE``;
+    a newer query (sent or answered from the cache) cancels the request of the one it
+    supersedes. Results are cached per normalized query. The newest query always gets
+    its exact result. A superseded query is answered with the cached results of its
+    longest cached prefix, filtered to its terms, since the remote shows only the
+    latest response anyway.
+    """
+
+    def __init__(self) -> None:
+        self._cache: OrderedDict[tuple[Any, ...], tuple[float, Page]] = OrderedDict()
+        self._generation = 0
+        self._inflight: tuple[tuple[Any, ...], asyncio.Task[Page | None]] | None = None
+        self.stats: dict[str, int] = {"requests": 0, "hits": 0, "narrowed": 0, "superseded": 0}
+
+    async def search(self, query: str, variant: tuple[Any, ...], fetch: Fetch) -> Page | None:
+        """Return results for ``query``; ``variant`` holds the rest of the cache key
+        (page, limit, types). Superseded queries get narrowed or empty results."""
+        norm = normalize_query(query)
+        key = (norm, *variant)
+        self._generation += 1
+        generation = self._generation
+        if self._inflight and self._inflight[0] != key:
+            self._inflight[1].cancel()
+            self._inflight = None
+
+        cached = self._get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        await asyncio.sleep(SEARCH_DEBOUNCE)
+        if generation != self._generation:
+            return self._superseded(norm, variant)
+
+        if self._inflight is None or self._inflight[1].done():
+            task = asyncio.create_task(fetch())
+            task.add_done_callback(lambda t, k=key: self._store(k, t))
+            self._inflight = (key, task)
+            self.stats["requests"] += 1
+        task = self._inflight[1]
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return self._superseded(norm, variant)
+
+    def clear(self) -> None:
+        if self._inflight:
+            self._inflight[1].cancel()
+            self._inflight = None
+        self._cache.clear()
+
+    def _get(self, key: tuple[Any, ...]) -> Page | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > SEARCH_CACHE_TTL:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: tuple[Any, ...], task: asyncio.Task[Page | None]) -> None:
+        if self._inflight and self._inflight[1] is task:
+            self._inflight = None
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        self._cache[key] = (time.monotonic(), task.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > SEARCH_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _superseded(self, norm: str, variant: tuple[Any, ...]) -> Page:
+        self.stats["superseded"] += 1
+        narrowed = self._narrowed(norm, variant)
+        if narrowed is None:
+            return [], 0
+        self.stats["narrowed"] += 1
+        return narrowed
+
+    def _narrowed(self, norm: str, variant: tuple[Any, ...]) -> Page | None:
+        """Results of the longest cached prefix of ``norm``, filtered to its terms."""
+        if variant[0] != 1:  # page
+            return None
+        for end in range(len(norm) - 1, 0, -1):
+            cached = self._get((norm[:end], *variant))
+            if cached is not None:
+                terms = tokenize(norm)
+                items = [item for item in cached[0] if _matches(item, terms)]
+                _LOG.debug("Narrowed %d cached results of %r to %d for %r", len(cached[0]), norm[:end],
+                           len(items), norm)
+                return items, len(items)
+        return None
@@ -20,15 +20,18 @@ class SpotifySetupFlow(BaseSetupFlow[SpotifyDeviceConfig]):
         super().__init__(*args, **kwargs)
         self._client_id: str = ""
         self._client_secret: str = ""
+        self._browse_prefetch: bool = False
 
     def get_manual_entry_form(self) -> RequestUserInput:
         existing_client_id = ""
         existing_client_secret = ""
+        existing_prefetch = False
         if self._selected_config_id:
             existing = self.config.get(self._selected_config_id)
             if existing:
                 existing_client_id = existing.client_id
                 existing_client_secret = existing.client_secret
+                existing_prefetch = existing.browse_prefetch
 
         return RequestUserInput(
             {"en": "Spotify Setup"},
@@ -62,6 +65,11 @@ class SpotifySetupFlow(BaseSetupFlow[SpotifyDeviceConfig]):
                     "label": {"en": "Spotify Client Secret"},
                     "field": {"text": {"value": existing_client_secret}},
                 },
+                {
+                    "id": "browse_prefetch",
+                    "label": {"en": "Preload the next browse pages (uses extra Spotify API requests)"},
+                    "field": {"checkbox": {"value": existing_prefetch}},
+                },
             ],
         )
 
@@ -79,6 +87,7 @@ class SpotifySetupFlow(BaseSetupFlow[SpotifyDeviceConfig]):
 
         self._client_id = client_id
         self._client_secret = client_secret
+        self._browse_prefetch = str(input_values.get("browse_prefetch", False)).lower() == "true"
 
         client = SpotifyClient()
         auth_url = client.get_authorization_url(client_id)
@@ -153,6 +162,7 @@ class SpotifySetupFlow(BaseSetupFlow[SpotifyDeviceConfig]):
 
         import time
 
+        existing = self.config.get(identifier)
         return SpotifyDeviceConfig(
             identifier=identifier,
             name=name,
@@ -162,6 +172,10 @@ class SpotifySetupFlow(BaseSetupFlow[SpotifyDeviceConfig]):
             refresh_token=refresh_token,
             token_expires_at=int(time.time()) + expires_in - 60,
             user_id=user_id,
+            browse_prefetch=self._browse_prefetch,
+            browse_prefetch_budget=(
+                existing.browse_prefetch_budget if existing else SpotifyDeviceConfig.browse_prefetch_budget
+            ),
         )
 
     def _resolve_account_identity(
@@ -0,0 +1,138 @@
+"""Spotify root menu thumbnails. :copyright: (c) 2024 by Meir Miyara. :license: MPL-2.0"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING
+
+from uc_intg_spotify.artwork import ARTWORK_TILE, pick_image, proxied
+
+if TYPE_CHECKING:
+    from uc_intg_spotify.client import SpotifyClient
+
+_LOG = logging.getLogger(__name__)
+
+ROOT_THUMBNAIL_TTL = 86400  # seconds before cover images are looked up again
+ROOT_THUMBNAIL_RETRY = 300  # seconds between attempts after a failed lookup
+
+
+async def fetch_root_thumbnails(client: SpotifyClient) -> dict[str, str | None]:
+    """Pick one cover image (Spotify CDN URL) per root node. Costs eight API requests."""
+    async def _first_image(coro, *keys) -> tuple[str, str | None]:
+        try:
+            data = await coro
+            if not data:
+                return keys[0], None
+            obj = data
+            for k in keys[1:]:
+                obj = obj.get(k, {}) if isinstance(obj, dict) else {}
+            items = obj.get("items", []) if isinstance(obj, dict) else obj
+            if isinstance(items, list):
+                for item in items:
+                    track = item.get("track", item) if isinstance(item, dict) else item
+                    if isinstance(track, dict):
+                        images = track.get("images") or track.get("album", {}).get("images", [])
+                        if images:
+                            return keys[0], pick_image(images, ARTWORK_TILE, rewrite=False)
+        except Exception:
+            pass
+        return keys[0], None
+
+    results = await asyncio.gather(
+        _first_image(client.get_user_playlists(limit=1, offset=0), "playlists"),
+        _first_image(client.get_saved_tracks(limit=1, offset=0), "saved_tracks"),
+        _first_image(client.get_saved_albums(limit=1, offset=0), "saved_albums"),
+        _first_image(client.get_recently_played(limit=1), "recently_played"),
+        _first_image(client.get_top_tracks(limit=1, offset=0), "top_tracks"),
+        _first_image(client.get_top_artists(limit=1, offset=0), "top_artists"),
+        _first_image(client.get_followed_artists(limit=1), "followed_artists", "artists"),
+        _first_image(client.get_new_releases(limit=1, offset=0), "new_releases", "albums"),
+        return_exceptions=True,
+    )
+
+    thumbnails: dict[str, str | None] = {}
+    for result in results:
+        if isinstance(result, tuple):
+            thumbnails[result[0]] = result[1]
+    return thumbnails
+
+
+class RootThumbnails:
+    """Per-account root thumbnails, persisted as JSON next to the integration config.
+
+    Reading never touches the network: a stale or missing set is refreshed in the
+    background and shows up on the next visit of the root menu. CDN URLs are stored
+    and only rewritten for the artwork proxy when read, so a changed proxy address
+    or a disabled proxy never leaves dead tiles behind.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self._path = path
+        self._thumbnails: dict[str, str | None] = {}
+        self._updated = 0.0
+        self._attempted = 0.0
+        self._loaded = False
+        self._task: asyncio.Task[None] | None = None
+
+    def get(self) -> dict[str, str | None]:
+        self._load()
+        return {node: proxied(url, ARTWORK_TILE) for node, url in self._thumbnails.items()}
+
+    @property
+    def stale(self) -> bool:
+        self._load()
+        return time.time() - self._updated > ROOT_THUMBNAIL_TTL
+
+    def refresh_if_stale(self, client: SpotifyClient) -> None:
+        if not self.stale or time.time() - self._attempted < ROOT_THUMBNAIL_RETRY:
+            return
+        if self._task is None or self._task.done():
+            self._attempted = time.time()
+            self._task = asyncio.create_task(self.refresh(client))
+
+    async def refresh(self, client: SpotifyClient) -> None:
+        thumbnails = await fetch_root_thumbnails(client)
+        if not any(thumbnails.values()):
+            _LOG.debug("Root thumbnail lookup returned nothing, keeping previous set")
+            return
+        self._thumbnails = thumbnails
+        self._updated = time.time()
+        if self._path:
+            payload = {"updated": self._updated, "thumbnails": thumbnails}
+            try:
+                await asyncio.to_thread(_write_json, self._path, payload)
+            except OSError as err:
+                _LOG.warning("Could not save root thumbnails: %s", err)
+
+    async def cancel(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self._path or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._thumbnails = dict(data.get("thumbnails") or {})
+            self._updated = float(data.get("updated", 0))
+        except (OSError, ValueError, AttributeError) as err:
+            _LOG.debug("Ignoring unreadable root thumbnail cache %s: %s", self._path, err)
+
+
+def _write_json(path: str, payload: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)